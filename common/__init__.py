@@ -0,0 +1,10 @@
+"""
+Общий код проектов ya_news и ya_note.
+
+Здесь лежит инфраструктура, одинаковая для обоих проектов: настройка
+соединений с SQLite, метрики, профилирование, кеш авторизации,
+нагрузочный прогон и бюджет запросов в тестах. Настройки каждого
+проекта добавляют корень репозитория в sys.path и подключают common
+в INSTALLED_APPS ради общих команд, а сами проекты задают только
+свои значения настроек и маршруты.
+"""
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = 'auth:user:{pk}'
+
+
+def forget_user(pk):
+    cache.delete(USER_CACHE_KEY.format(pk=pk))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который достаёт пользователя сессии из кеша.
+
+    Запись сбрасывается при сохранении и удалении пользователя
+    (в том числе при смене пароля) и при выходе, поэтому хеш пароля
+    для проверки сессии всегда актуален.
+
+    В сессии хранится путь бэкенда, которым вошёл пользователь.
+    Сессия с путём, которого нет в AUTHENTICATION_BACKENDS, считается
+    анонимной, поэтому смена AUTHENTICATION_BACKENDS (в том числе
+    через AUTH_CACHE) завершает все действующие сессии.
+    """
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(pk=user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
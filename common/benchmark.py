@@ -0,0 +1,376 @@
+import http.client
+import io
+import json
+import math
+import queue
+import threading
+import time
+from collections import defaultdict, namedtuple
+from socketserver import ThreadingMixIn
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.utils.module_loading import import_string
+
+PERCENTILES = (50, 95, 99)
+SERVER_HOST = '127.0.0.1'
+SERVER_NAME = 'localhost'
+TRANSPORTS = ('inprocess', 'http')
+DEFAULT_THRESHOLD = 0.2
+
+# Запрос смеси: маршрут, метод, адрес, данные формы и cookie сессии.
+# Адрес и данные могут быть функциями, чтобы запросы отличались.
+Step = namedtuple('Step', ('route', 'method', 'path', 'data', 'session'))
+RouteStats = namedtuple(
+    'RouteStats', ('requests', 'errors', 'rps', 'p50', 'p95', 'p99')
+)
+
+
+def percentile(latencies, percent):
+    """Перцентиль по ближайшему рангу, latencies отсортированы."""
+    return latencies[max(math.ceil(percent / 100 * len(latencies)) - 1, 0)]
+
+
+def get_session_cookie(user):
+    """Cookie сессии вошедшего пользователя."""
+    client = Client()
+    client.force_login(user)
+    return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+
+def make_csrf_pair():
+    """Значение cookie CSRF и токен для заголовка X-CSRFToken."""
+    request = HttpRequest()
+    token = get_token(request)
+    return request.META['CSRF_COOKIE'], token
+
+
+def resolve(value):
+    return value() if callable(value) else value
+
+
+class InProcessTransport:
+    """Вызывает WSGI-приложение напрямую, без сети."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def request(self, method, path, body, headers):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': SERVER_NAME,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': SERVER_HOST,
+            'HTTP_HOST': SERVER_NAME,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers.items():
+            key = name.upper().replace('-', '_')
+            if key != 'CONTENT_TYPE':
+                key = f'HTTP_{key}'
+            environ[key] = value
+        status = []
+
+        def start_response(response_status, response_headers,
+                           exc_info=None):
+            status.append(response_status)
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return int(status[0].split()[0])
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class HttpTransport:
+    """Поднимает локальный многопоточный WSGI-сервер и ходит по HTTP."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def __enter__(self):
+        self.server = make_server(
+            SERVER_HOST, 0, self.application,
+            server_class=ThreadingWSGIServer,
+            handler_class=QuietRequestHandler,
+        )
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def request(self, method, path, body, headers):
+        connection = http.client.HTTPConnection(
+            SERVER_HOST, self.server.server_port
+        )
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+
+TRANSPORT_CLASSES = {
+    'inprocess': InProcessTransport,
+    'http': HttpTransport,
+}
+
+
+class MixRunner:
+    """
+    Прогоняет смесь запросов через транспорт в несколько потоков.
+
+    План из requests запросов раскладывается по весам шагов смеси,
+    потоки разбирают его из общей очереди. Каждый поток копит
+    задержки у себя, результаты сводятся после завершения.
+    """
+
+    def __init__(self, transport, mix, concurrency):
+        self.transport = transport
+        self.mix = mix
+        self.concurrency = concurrency
+        self.csrf_cookie, self.csrf_token = make_csrf_pair()
+
+    def make_plan(self, requests):
+        total_weight = sum(weight for _, weight in self.mix)
+        plan = queue.SimpleQueue()
+        for index in range(requests):
+            position = index % total_weight
+            for step, weight in self.mix:
+                if position < weight:
+                    plan.put(step)
+                    break
+                position -= weight
+        return plan
+
+    def send(self, step):
+        cookies = [f'{settings.CSRF_COOKIE_NAME}={self.csrf_cookie}']
+        if step.session:
+            cookies.append(f'{settings.SESSION_COOKIE_NAME}={step.session}')
+        headers = {'Cookie': '; '.join(cookies)}
+        body = b''
+        if step.method == 'POST':
+            headers['X-CSRFToken'] = self.csrf_token
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            body = urlencode(resolve(step.data)).encode()
+        return self.transport.request(
+            step.method, resolve(step.path), body, headers
+        )
+
+    def work(self, plan, latencies, errors):
+        try:
+            while True:
+                try:
+                    step = plan.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.perf_counter()
+                status = self.send(step)
+                latencies[step.route].append(time.perf_counter() - start)
+                if status >= 400:
+                    errors[step.route] += 1
+        finally:
+            connections.close_all()
+
+    def run(self, requests):
+        """Статистика по маршрутам: RouteStats с задержками в мс."""
+        plan = self.make_plan(requests)
+        results = [
+            (defaultdict(list), defaultdict(int))
+            for _ in range(self.concurrency)
+        ]
+        threads = [
+            threading.Thread(target=self.work, args=(plan, *result))
+            for result in results
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        for thread_latencies, thread_errors in results:
+            for route, values in thread_latencies.items():
+                latencies[route].extend(values)
+            for route, count in thread_errors.items():
+                errors[route] += count
+        stats = {}
+        for route, values in sorted(latencies.items()):
+            values.sort()
+            stats[route] = RouteStats(
+                len(values), errors[route], len(values) / elapsed,
+                *(percentile(values, percent) * 1000
+                  for percent in PERCENTILES),
+            )
+        return stats
+
+
+def run_benchmark(application, mix, transports, requests, concurrency):
+    """Статистика по транспортам и маршрутам."""
+    results = {}
+    for name in transports:
+        with TRANSPORT_CLASSES[name](application) as transport:
+            results[name] = MixRunner(transport, mix, concurrency).run(
+                requests
+            )
+    return results
+
+
+def to_baseline(results):
+    return {
+        transport: {
+            route: stats._asdict() for route, stats in routes.items()
+        }
+        for transport, routes in results.items()
+    }
+
+
+def save_baseline(results, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(to_baseline(results), file, ensure_ascii=False, indent=2)
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Маршруты, которые стали хуже базового замера больше чем на threshold.
+
+    Сравниваются p95 и число запросов в секунду.
+    """
+    regressions = []
+    for transport, routes in results.items():
+        for route, stats in routes.items():
+            base = baseline.get(transport, {}).get(route)
+            if base is None:
+                continue
+            if stats.p95 > base['p95'] * (1 + threshold):
+                regressions.append(
+                    f'{transport} {route}: p95 {stats.p95:.1f} мс '
+                    f'против {base["p95"]:.1f} мс'
+                )
+            if stats.rps < base['rps'] / (1 + threshold):
+                regressions.append(
+                    f'{transport} {route}: {stats.rps:.0f} запросов/с '
+                    f'против {base["rps"]:.0f}'
+                )
+    return regressions
+
+
+def format_report(results):
+    header = ('Транспорт', 'Маршрут', 'Запросов', 'Ошибок', 'Запросов/с',
+              'p50 мс', 'p95 мс', 'p99 мс')
+    rows = [header] + [
+        (transport, route, str(stats.requests), str(stats.errors),
+         f'{stats.rps:.0f}', f'{stats.p50:.1f}', f'{stats.p95:.1f}',
+         f'{stats.p99:.1f}')
+        for transport, routes in results.items()
+        for route, stats in routes.items()
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return '\n'.join(
+        '  '.join(
+            cell.ljust(width) for cell, width in zip(row, widths)
+        ).rstrip()
+        for row in rows
+    )
+
+
+class BenchRoutesCommand(BaseCommand):
+    """
+    Основа команды bench_routes: прогон, отчёт и базовый замер.
+
+    Проект описывает только свою смесь: prepare_mix(**options) —
+    контекстный менеджер, который создаёт данные прогона, отдаёт
+    смесь ((Step, вес), ...) и удаляет данные после прогона.
+    Свои параметры проект добавляет в add_arguments.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--transport', choices=TRANSPORTS, action='append',
+            help='inprocess — вызов WSGI-приложения напрямую, '
+                 'http — через локальный сервер. По умолчанию оба.'
+        )
+        parser.add_argument(
+            '--save-baseline', dest='output', metavar='PATH',
+            help='Файл JSON, в который записать результаты.'
+        )
+        parser.add_argument(
+            '--baseline', metavar='PATH',
+            help='Файл JSON базового замера для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=DEFAULT_THRESHOLD,
+            help='Допустимое ухудшение p95 и запросов в секунду, доля.'
+        )
+
+    def prepare_mix(self, **options):
+        raise NotImplementedError
+
+    def handle(self, *args, requests, concurrency, transport, output,
+               baseline, threshold, **options):
+        with self.prepare_mix(**options) as mix:
+            results = run_benchmark(
+                import_string(settings.WSGI_APPLICATION), mix,
+                transport or TRANSPORTS, requests, concurrency,
+            )
+        self.stdout.write(format_report(results))
+        if output:
+            save_baseline(results, output)
+        if baseline:
+            with open(baseline, encoding='utf-8') as file:
+                regressions = find_regressions(
+                    results, json.load(file), threshold
+                )
+            if regressions:
+                raise CommandError(
+                    'Маршруты медленнее базового замера:\n'
+                    + '\n'.join(regressions)
+                )
@@ -0,0 +1,18 @@
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Применяем профиль настроек SQLite к новому соединению.
+
+    WAL позволяет читать во время записи, synchronous=NORMAL в режиме
+    WAL не теряет согласованность базы, busy_timeout заставляет ждать
+    блокировку записи, а не падать сразу. mmap_size, cache_size
+    и temp_store сокращают чтение с диска. Значения берутся
+    из SQLITE_PRAGMAS, пустой словарь оставляет настройки SQLite.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
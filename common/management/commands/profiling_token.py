@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from common.profiling import make_profiling_token
+
+
+class Command(BaseCommand):
+    help = 'Выводит подписанное значение заголовка X-Profile.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profiling_token())
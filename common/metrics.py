@@ -0,0 +1,254 @@
+import bisect
+import hmac
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import Http404, HttpResponse
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+LABEL_NAMES = ('view', 'method')
+# Метод запроса приходит от клиента: прочие значения сводим в other,
+# иначе каждый выдуманный метод заводил бы новые ряды.
+METHODS = frozenset(
+    ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE')
+)
+# Имя гистограммы: описание и границы корзин.
+HISTOGRAMS = {
+    'http_request_duration_seconds': (
+        'Время ответа на запрос.', LATENCY_BUCKETS
+    ),
+    'db_queries_per_request': (
+        'Число SQL-запросов за запрос.', QUERY_COUNT_BUCKETS
+    ),
+    'db_query_duration_seconds': (
+        'Суммарное время SQL-запросов за запрос.', LATENCY_BUCKETS
+    ),
+    'template_render_duration_seconds': (
+        'Время рендеринга шаблона ответа.', LATENCY_BUCKETS
+    ),
+    'http_response_size_bytes': (
+        'Размер тела ответа.', SIZE_BUCKETS
+    ),
+}
+
+
+class Series:
+    """Корзины, сумма и число наблюдений одной гистограммы."""
+    __slots__ = ('buckets', 'total')
+
+    def __init__(self, size):
+        # Последняя корзина — +Inf.
+        self.buckets = [0] * (size + 1)
+        self.total = 0
+
+
+class MetricsRegistry:
+    """
+    Гистограммы с шардами по потокам.
+
+    Каждый поток пишет только в свой шард, поэтому запись идёт
+    без блокировок; блокировка берётся лишь при появлении нового
+    потока. При выгрузке шарды складываются. Когда поток завершается,
+    его шард сливается в общий retired: серверы с потоком на запрос
+    не копят шарды.
+
+    Реестр живёт в памяти процесса, при нескольких процессах
+    каждый отдаёт только свои наблюдения.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.shards = []
+        self.retired = {}
+        self.lock = threading.Lock()
+
+    def get_shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards.append(shard)
+            weakref.finalize(threading.current_thread(), self.retire, shard)
+            return shard
+
+    def retire(self, shard):
+        """Переносим шард завершённого потока в retired."""
+        with self.lock:
+            self.shards.remove(shard)
+            for key, series in shard.items():
+                retired = self.retired.get(key)
+                if retired is None:
+                    retired = self.retired[key] = Series(
+                        len(series.buckets) - 1
+                    )
+                retired.buckets = [
+                    a + b for a, b in zip(retired.buckets, series.buckets)
+                ]
+                retired.total += series.total
+
+    def observe(self, name, labels, value):
+        shard = self.get_shard()
+        key = (name, labels)
+        series = shard.get(key)
+        bounds = HISTOGRAMS[name][1]
+        if series is None:
+            series = shard[key] = Series(len(bounds))
+        series.buckets[bisect.bisect_left(bounds, value)] += 1
+        series.total += value
+
+    def collect(self):
+        """Сумма шардов: (имя, метки) -> (корзины, сумма)."""
+        with self.lock:
+            shards = [self.retired.copy(), *self.shards]
+        merged = {}
+        for shard in shards:
+            for key, series in shard.copy().items():
+                buckets, total = merged.get(
+                    key, ([0] * len(series.buckets), 0)
+                )
+                merged[key] = (
+                    [a + b for a, b in zip(buckets, series.buckets)],
+                    total + series.total,
+                )
+        return merged
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        merged = self.collect()
+        lines = []
+        for name, (description, bounds) in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (series_name, labels), (buckets, total) in sorted(
+                merged.items()
+            ):
+                if series_name != name:
+                    continue
+                label_text = ','.join(
+                    f'{label}="{escape(value)}"'
+                    for label, value in zip(LABEL_NAMES, labels)
+                )
+                count = 0
+                for bound, bucket in zip(bounds + ('+Inf',), buckets):
+                    count += bucket
+                    lines.append(
+                        f'{name}_bucket{{{label_text},le="{bound}"}} {count}'
+                    )
+                lines.append(f'{name}_sum{{{label_text}}} {total}')
+                lines.append(f'{name}_count{{{label_text}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """Обёртка execute, которая считает SQL-запросы и их время."""
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Записывает время ответа, SQL-запросы, рендеринг и размер ответа.
+
+    Метки — имя маршрута и метод HTTP. При METRICS_ENABLED = False
+    промежуточный слой не подключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        labels = (
+            match.view_name if match else 'unresolved',
+            request.method if request.method in METHODS else 'other',
+        )
+        registry.observe('http_request_duration_seconds', labels, duration)
+        registry.observe('db_queries_per_request', labels, queries.count)
+        registry.observe('db_query_duration_seconds', labels, queries.seconds)
+        render = getattr(request, 'template_render_seconds', None)
+        if render is not None:
+            registry.observe(
+                'template_render_duration_seconds', labels, render
+            )
+        if not response.streaming:
+            registry.observe(
+                'http_response_size_bytes', labels, len(response.content)
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Засекаем рендеринг шаблона.
+
+        Этот слой подключён первым, поэтому метод вызывается
+        последним, прямо перед render().
+        """
+        start = time.perf_counter()
+
+        def finish(response):
+            request.template_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(finish)
+        return response
+
+
+def is_metrics_request_allowed(request):
+    """
+    Запрос метрик несёт заголовок Authorization: Bearer METRICS_TOKEN.
+
+    Адрес клиента не проверяем: за обратным прокси он всегда
+    локальный. Без METRICS_TOKEN метрики не отдаются никому.
+    """
+    if not settings.METRICS_TOKEN:
+        return False
+    return hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', ''),
+        f'Bearer {settings.METRICS_TOKEN}'
+    )
+
+
+def metrics_view(request):
+    """Метрики для Prometheus, доступны только с токеном."""
+    if not is_metrics_request_allowed(request):
+        raise Http404
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
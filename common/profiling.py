@@ -0,0 +1,105 @@
+import cProfile
+import io
+import os
+import pstats
+import secrets
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+PROFILING_HEADER = 'HTTP_X_PROFILE'
+PROFILING_PARAM = 'profile'
+PROFILING_SALT = 'profiling'
+PROFILING_TOKEN = 'profile'
+PROFILING_USES_KEY = 'profiling:uses:{nonce}'
+
+
+def make_profiling_token():
+    """
+    Значение заголовка X-Profile, подписанное SECRET_KEY.
+
+    Случайная часть отличает токены друг от друга, чтобы считать
+    запросы по каждому токену отдельно.
+    """
+    return signing.TimestampSigner(salt=PROFILING_SALT).sign(
+        f'{PROFILING_TOKEN}:{secrets.token_hex(16)}'
+    )
+
+
+def is_valid_token(value):
+    """
+    Проверяем подпись и срок токена и считаем его запросы в кеше.
+
+    Токен действует не больше PROFILING_TOKEN_MAX_USES раз, поэтому
+    перехваченный заголовок не позволит заполнить диск профилями.
+    """
+    try:
+        token, nonce = signing.TimestampSigner(salt=PROFILING_SALT).unsign(
+            value, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        ).split(':', 1)
+    except (signing.BadSignature, ValueError):
+        return False
+    if token != PROFILING_TOKEN:
+        return False
+    key = PROFILING_USES_KEY.format(nonce=nonce)
+    cache.add(key, 0, settings.PROFILING_TOKEN_MAX_AGE)
+    try:
+        return cache.incr(key) <= settings.PROFILING_TOKEN_MAX_USES
+    except ValueError:
+        # Счётчик вытеснен из кеша между add и incr.
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует отдельный запрос через cProfile.
+
+    Запрос профилируется по подписанному заголовку X-Profile, который
+    действует ограниченное число раз, или по параметру ?profile для
+    персонала. В PROFILING_DIR пишутся файл
+    .prof и текстовая сводка, в имени которых есть имя маршрута.
+    Без PROFILING_DIR промежуточный слой не подключается вовсе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_requested(request):
+            return self.get_response(request)
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        response = profile.runcall(self.get_response, request)
+        self.save(request, profile, time.perf_counter() - start)
+        return response
+
+    def is_requested(self, request):
+        header = request.META.get(PROFILING_HEADER)
+        if header is not None:
+            return is_valid_token(header)
+        return PROFILING_PARAM in request.GET and request.user.is_staff
+
+    def save(self, request, profile, seconds):
+        match = request.resolver_match
+        name = match.view_name.replace(':', '-') if match else 'unresolved'
+        # Случайный суффикс: профили одного маршрута, снятые в одну
+        # секунду с одинаковой длительностью, не затирают друг друга.
+        path = os.path.join(
+            settings.PROFILING_DIR,
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{name}-'
+            f'{seconds * 1000:.0f}ms-{secrets.token_hex(4)}'
+        )
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        profile.dump_stats(path + '.prof')
+        summary = io.StringIO()
+        summary.write(f'{request.method} {request.get_full_path()}\n')
+        pstats.Stats(profile, stream=summary).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(settings.PROFILING_TOP)
+        with open(path + '.txt', 'w', encoding='utf-8') as file:
+            file.write(summary.getvalue())
@@ -0,0 +1,109 @@
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+Budget = namedtuple('Budget', ('queries', 'milliseconds'))
+Measurement = namedtuple(
+    'Measurement', ('route', 'scale', 'queries', 'milliseconds')
+)
+
+REPORT_HEADER = ('Маршрут', 'Объём данных', 'Запросов', 'мс')
+
+
+class QueryBudget:
+    """
+    Замеры числа SQL-запросов и времени ответа по именованным маршрутам.
+
+    Бюджет задаётся словарём {имя маршрута: Budget}. В тестах pytest
+    экземпляр отдаёт фикстура из fixture(), в TestCase — атрибут
+    query_budget примеси QueryBudgetMixin. Таблица замеров выводится
+    один раз, из pytest_terminal_summary через write_summary().
+    """
+
+    def __init__(self, budgets):
+        self.budgets = budgets
+        self.measurements = []
+
+    @contextmanager
+    def measure(self, route, scale):
+        """Замеряет запросы и время выполнения блока кода."""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            yield
+            milliseconds = (time.perf_counter() - start) * 1000
+        self.measurements.append(
+            Measurement(route, scale, len(queries), milliseconds)
+        )
+
+    def get_errors(self, route):
+        """
+        Возвращает нарушения бюджета маршрута.
+
+        Число запросов не должно превышать бюджет и не должно
+        расти с объёмом данных.
+        """
+        budget = self.budgets[route]
+        measurements = [m for m in self.measurements if m.route == route]
+        errors = []
+        for measurement in measurements:
+            if measurement.queries > budget.queries:
+                errors.append(
+                    f'{route} ({measurement.scale}): {measurement.queries} '
+                    f'запросов при бюджете {budget.queries}'
+                )
+            if measurement.milliseconds > budget.milliseconds:
+                errors.append(
+                    f'{route} ({measurement.scale}): '
+                    f'{measurement.milliseconds:.1f} мс '
+                    f'при бюджете {budget.milliseconds} мс'
+                )
+        if len({m.queries for m in measurements}) > 1:
+            errors.append(
+                f'{route}: число запросов растёт с объёмом данных: '
+                + ', '.join(f'{m.scale}: {m.queries}' for m in measurements)
+            )
+        return errors
+
+    def report(self):
+        """Таблица замеров по маршрутам."""
+        rows = [REPORT_HEADER] + [
+            (m.route, str(m.scale), str(m.queries), f'{m.milliseconds:.1f}')
+            for m in sorted(self.measurements)
+        ]
+        widths = [max(len(row[i]) for row in rows) for i in range(4)]
+        return '\n'.join(
+            '  '.join(
+                cell.ljust(width) for cell, width in zip(row, widths)
+            ).rstrip()
+            for row in rows
+        )
+
+    def write_summary(self, terminalreporter):
+        """Выводит таблицу замеров в конце запуска pytest."""
+        if self.measurements:
+            terminalreporter.write_sep('=', 'Бюджет запросов по маршрутам')
+            terminalreporter.write_line(self.report())
+
+    def fixture(self, name='query_budget'):
+        """Фикстура pytest, которая отдаёт этот экземпляр."""
+        import pytest
+
+        return pytest.fixture(name=name)(lambda: self)
+
+
+class QueryBudgetMixin:
+    """
+    Примесь для TestCase с проверкой бюджета запросов.
+
+    В классе теста задаётся атрибут query_budget с экземпляром
+    QueryBudget; замеры снимаются через self.query_budget.measure().
+    """
+    query_budget = None
+
+    def assert_within_budget(self, route):
+        errors = self.query_budget.get_errors(route)
+        if errors:
+            self.fail('\n'.join(errors))
@@ -0,0 +1,21 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite, в котором транзакция atomic() начинается с BEGIN IMMEDIATE.
+
+    Запись часто сначала читает (занятые slug, счётчики), потом пишет.
+    При обычном BEGIN две такие транзакции берут блокировку чтения,
+    и та, которой не досталась запись, сразу получает «database is
+    locked»: busy_timeout тут не помогает. BEGIN IMMEDIATE берёт
+    блокировку записи в начале транзакции, и вторая ждёт её
+    по busy_timeout.
+
+    Тестовая база поэтому тоже должна лежать в файле: у общей базы
+    в памяти свои табличные блокировки, на которых параллельные
+    запросы падают, а не ждут.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -10,6 +10,7 @@ class CommentInline(admin.StackedInline):
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    readonly_fields = ('comment_count',)
     inlines = [
         CommentInline,
     ]
@@ -0,0 +1,172 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.http import Http404, JsonResponse
+from django.views import generic
+
+from .models import Comment, News
+from .pagination import CURSOR_PARAM, decode_cursor, encode_cursor
+
+FIELDS_PARAM = 'fields'
+# Поле ответа и выражение, которым оно выбирается через values().
+NEWS_FIELDS = {
+    'id': F('pk'),
+    'title': F('title'),
+    'text': F('text'),
+    'date': F('date'),
+    'comment_count': F('comment_count'),
+}
+COMMENT_FIELDS = {
+    'id': F('pk'),
+    'text': F('text'),
+    'created': F('created'),
+    'author': F('author__username'),
+}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def get_fields(request, available):
+    """Поля, которые запросил клиент, по умолчанию все."""
+    raw = request.GET.get(FIELDS_PARAM)
+    if not raw:
+        return list(available)
+    fields = list(dict.fromkeys(
+        field.strip() for field in raw.split(',') if field.strip()
+    ))
+    unknown = set(fields) - set(available)
+    if unknown or not fields:
+        raise FieldsError(
+            'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            if unknown else 'Не указаны поля.'
+        )
+    return fields
+
+
+def get_values(queryset, fields, available, keys=()):
+    """
+    Словари ответа прямо из values(), без создания моделей.
+
+    Поля ключа курсора выбираются всегда, но в ответ
+    попадают, только если их запросили.
+    """
+    expressions = {f'api_{field}': available[field] for field in fields}
+    return queryset.values(*keys, **expressions)
+
+
+def project(row, fields):
+    return {field: row[f'api_{field}'] for field in fields}
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+class ApiPageView(generic.View):
+    """
+    Страница объектов с курсором по ключу сортировки.
+
+    Как у ListView, наследники задают model и ordering; поля ordering
+    служат и ключом курсора. Размер страницы берётся из настройки
+    page_size_setting во время запроса.
+    """
+    model = None
+    ordering = None
+    available_fields = None
+    page_size_setting = None
+
+    @property
+    def cursor_keys(self):
+        return tuple(name.lstrip('-') for name in self.ordering)
+
+    def get_queryset(self):
+        return self.model.objects.order_by(*self.ordering)
+
+    def filter_after(self, queryset, *key):
+        """Объекты после ключа курсора в порядке ordering."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, key):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return queryset.filter(condition)
+
+    def parent_exists(self):
+        """Проверяется, только если страница пуста."""
+        return True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            fields = get_fields(request, self.available_fields)
+        except FieldsError as exception:
+            return error(str(exception), HTTPStatus.BAD_REQUEST)
+        queryset = self.get_queryset()
+        cursor = request.GET.get(CURSOR_PARAM)
+        if cursor:
+            try:
+                key = decode_cursor(cursor)
+            except Http404:
+                return error('Некорректный курсор.', HTTPStatus.BAD_REQUEST)
+            queryset = self.filter_after(queryset, *key)
+        size = getattr(settings, self.page_size_setting)
+        rows = list(get_values(
+            queryset, fields, self.available_fields, self.cursor_keys
+        )[:size + 1])
+        if not rows and not self.parent_exists():
+            return error('Не найдено.', HTTPStatus.NOT_FOUND)
+        next_url = None
+        if len(rows) > size:
+            rows = rows[:size]
+            params = request.GET.copy()
+            params[CURSOR_PARAM] = encode_cursor(
+                *(rows[-1][key] for key in self.cursor_keys)
+            )
+            next_url = request.path + '?' + params.urlencode()
+        return JsonResponse({
+            'results': [project(row, fields) for row in rows],
+            'next': next_url,
+        })
+
+
+class NewsListApi(ApiPageView):
+    """Новости от новых к старым, курсор по (date, id)."""
+    model = News
+    ordering = ('-date', '-pk')
+    available_fields = NEWS_FIELDS
+    page_size_setting = 'NEWS_COUNT_ON_HOME_PAGE'
+
+
+class CommentsApi(ApiPageView):
+    """Комментарии новости от старых к новым, курсор по (created, id)."""
+    model = Comment
+    ordering = ('created', 'pk')
+    available_fields = COMMENT_FIELDS
+    page_size_setting = 'COMMENTS_COUNT_ON_DETAIL_PAGE'
+
+    def get_queryset(self):
+        return super().get_queryset().filter(news_id=self.kwargs['pk'])
+
+    def parent_exists(self):
+        """Несуществующая новость даёт 404, а не пустую ветку."""
+        return News.objects.filter(pk=self.kwargs['pk']).exists()
+
+
+class NewsDetailApi(generic.View):
+    """Одна новость."""
+
+    def get(self, request, *args, pk, **kwargs):
+        try:
+            fields = get_fields(request, NEWS_FIELDS)
+        except FieldsError as exception:
+            return error(str(exception), HTTPStatus.BAD_REQUEST)
+        row = get_values(
+            News.objects.filter(pk=pk), fields, NEWS_FIELDS
+        ).first()
+        if row is None:
+            return error('Не найдено.', HTTPStatus.NOT_FOUND)
+        return JsonResponse(project(row, fields))
@@ -0,0 +1,181 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+HOME_VERSION_KEY = 'news:version:home'
+HOME_NEWS_IDS_KEY = 'news:home:ids'
+NEWS_VERSION_KEY = 'news:version:news:{pk}'
+COMMENTS_VERSION_KEY = 'news:version:comments:{pk}'
+PAGE_KEY = 'news:page:{version}:{path}?{query}'
+
+
+def get_version(key):
+    """
+    Текущая версия группы страниц.
+
+    Версия — время последнего изменения в наносекундах,
+    если её нет в кеше, заводим новую.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """
+    Меняем версию, после чего старые страницы больше не читаются.
+
+    Версия меняется после фиксации транзакции: иначе параллельный
+    запрос успел бы закешировать старые данные под новой версией.
+    """
+    transaction.on_commit(
+        lambda: cache.set(key, time.time_ns(), None)
+    )
+
+
+def bump_home_version():
+    bump_version(HOME_VERSION_KEY)
+
+
+def bump_news_version(pk):
+    bump_version(NEWS_VERSION_KEY.format(pk=pk))
+
+
+def bump_comments_version(news_id):
+    bump_version(COMMENTS_VERSION_KEY.format(pk=news_id))
+
+
+def get_home_version_key(**kwargs):
+    return HOME_VERSION_KEY
+
+
+def get_news_version_key(pk):
+    return NEWS_VERSION_KEY.format(pk=pk)
+
+
+def remember_home_news(news_ids):
+    """Запоминаем, какие новости выведены на главной странице."""
+    cache.set(HOME_NEWS_IDS_KEY, list(news_ids), None)
+
+
+def is_on_home_page(pk):
+    """Выведена ли новость на главной; если неизвестно — считаем, что да."""
+    news_ids = cache.get(HOME_NEWS_IDS_KEY)
+    return news_ids is None or pk in news_ids
+
+
+def get_user_validator_parts(request):
+    """
+    Части ETag, которые отличают страницу авторизованного пользователя.
+
+    Кроме id и имени для шапки, это ключ сессии и токен CSRF: они
+    меняются при входе, а токен встроен в форму. Иначе после повторного
+    входа браузер получил бы 304 и отправил форму со старым токеном.
+    """
+    return [
+        str(request.user.pk), request.user.username,
+        request.session.session_key or '',
+        request.META.get('CSRF_COOKIE', ''),
+    ]
+
+
+def get_page_etag(version_key, request):
+    """Значение ETag страницы по версии её данных."""
+    parts = [str(get_version(version_key))]
+    if request.user.is_authenticated:
+        parts += get_user_validator_parts(request)
+    return hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def get_page_last_modified(version_key):
+    """Время последнего изменения данных страницы."""
+    return datetime.fromtimestamp(
+        get_version(version_key) / 10 ** 9, tz=timezone.utc
+    )
+
+
+def store_page(key, response):
+    """
+    Кладём страницу в кеш вместе с типом содержимого.
+
+    TemplateResponse сохраняется после рендеринга, обычный
+    ответ (например, XML ленты) — сразу.
+    """
+    def store(rendered):
+        cache.set(
+            key, (rendered.content, rendered['Content-Type']),
+            settings.PAGE_CACHE_TIMEOUT
+        )
+
+    if hasattr(response, 'add_post_render_callback'):
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+
+
+def cache_anonymous_page(get_version_key, query_params=()):
+    """
+    Кешируем страницу целиком для анонимных GET-запросов.
+
+    Авторизованным пользователям страница всегда рендерится заново:
+    в ней есть шапка с именем пользователя и форма комментария.
+    get_version_key получает именованные аргументы представления
+    и возвращает ключ версии, которую сбрасывают сигналы.
+    В ключ страницы входят только параметры запроса из query_params,
+    которые читает представление: произвольные параметры
+    не заводят новых копий страницы.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+            key = PAGE_KEY.format(
+                version=get_version(get_version_key(**kwargs)),
+                path=request.path,
+                query=urlencode([
+                    (name, request.GET[name]) for name in query_params
+                    if name in request.GET
+                ]),
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                store_page(key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(get_version_key):
+    """
+    Отвечаем 304 по ETag и Last-Modified до рендеринга страницы.
+
+    Валидаторы берутся из версий кеша и не требуют запросов к БД.
+    Last-Modified отдаём только анонимным пользователям: дата
+    не различает пользователей, а ETag различает.
+    """
+    def get_last_modified(request, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return get_page_last_modified(get_version_key(**kwargs))
+
+    return condition(
+        etag_func=lambda request, **kwargs: get_page_etag(
+            get_version_key(**kwargs), request
+        ),
+        last_modified_func=get_last_modified,
+    )
@@ -0,0 +1,16 @@
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 15
+EXCERPT_MAX_LENGTH = 300
+
+
+def make_excerpt(text):
+    """
+    Начало текста новости для списков, как у truncatewords.
+
+    Длина ограничена ещё и в символах, чтобы несколько очень
+    длинных слов не раздували выборку списка.
+    """
+    return Truncator(
+        Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    ).chars(EXCERPT_MAX_LENGTH)
@@ -0,0 +1,107 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+
+from .cache import (cache_anonymous_page, conditional_page,
+                    get_home_version_key, get_news_version_key)
+from .models import News
+from .pagination import get_comments_url, get_latest_comments
+
+
+class LatestNewsFeed(Feed):
+    """Лента последних новостей, тех же, что на главной."""
+    title = 'YaNews'
+    description = 'Последние новости YaNews.'
+
+    def link(self):
+        return reverse('news:home')
+
+    def items(self):
+        return News.objects.only(
+            'pk', 'title', 'text', 'date'
+        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('news:detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.date, time.min))
+
+
+class LatestNewsAtomFeed(LatestNewsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestNewsFeed.description
+
+
+class NewsCommentsFeed(Feed):
+    """Лента последних комментариев к новости."""
+
+    def get_object(self, request, pk):
+        return get_object_or_404(News.objects.only('pk', 'title'), pk=pk)
+
+    def title(self, obj):
+        return f'Комментарии: {obj.title}'
+
+    def description(self, obj):
+        return f'Последние комментарии к новости «{obj.title}».'
+
+    def link(self, obj):
+        return reverse('news:detail', args=(obj.pk,))
+
+    def items(self, obj):
+        return get_latest_comments(obj.pk)
+
+    def item_title(self, item):
+        return item.author.username
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return get_comments_url(
+            item.news_id, item.page_cursor, anchor=f'comment-{item.pk}'
+        )
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.created
+
+
+class NewsCommentsAtomFeed(NewsCommentsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def cached_feed(feed, get_version_key):
+    """
+    Лента с кешем XML и условными запросами.
+
+    XML строится один раз на версию данных, которую сбрасывают
+    сигналы изменения новостей и комментариев.
+    """
+    return conditional_page(get_version_key)(
+        cache_anonymous_page(get_version_key)(feed)
+    )
+
+
+latest_news_rss = cached_feed(LatestNewsFeed(), get_home_version_key)
+latest_news_atom = cached_feed(LatestNewsAtomFeed(), get_home_version_key)
+news_comments_rss = cached_feed(NewsCommentsFeed(), get_news_version_key)
+news_comments_atom = cached_feed(
+    NewsCommentsAtomFeed(), get_news_version_key
+)
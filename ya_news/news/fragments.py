@@ -0,0 +1,60 @@
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from .cache import COMMENTS_VERSION_KEY, get_version
+from .pagination import get_comments_page
+
+COMMENTS_FRAGMENT_KEY = 'news:comments:{pk}:{version}:{cursor}'
+COMMENTS_TEMPLATE = 'includes/comments.html'
+CONTROLS_MARKER = re.compile(r'<!--controls:(\d+):(\d+)-->')
+CONTROLS = (
+    '<a href="{}">Редактировать</a> |\n'
+    '    <a href="{}">Удалить</a>'
+)
+
+
+def get_comments_fragment(news_id, cursor=None):
+    """
+    Отрендеренная страница комментариев и курсор следующей страницы.
+
+    Фрагмент общий для всех пользователей и хранится в кеше, пока
+    не изменится версия комментариев новости. На месте ссылок
+    редактирования и удаления в нём стоят метки с id автора.
+    """
+    key = COMMENTS_FRAGMENT_KEY.format(
+        pk=news_id,
+        version=get_version(COMMENTS_VERSION_KEY.format(pk=news_id)),
+        cursor=cursor or '',
+    )
+    fragment = cache.get(key)
+    if fragment is None:
+        comments, next_cursor = get_comments_page(news_id, cursor)
+        html = render_to_string(COMMENTS_TEMPLATE, {
+            'news_id': news_id,
+            'comments': comments,
+            'cursor': cursor,
+            'next_cursor': next_cursor,
+        })
+        fragment = html, next_cursor
+        cache.set(key, fragment, settings.PAGE_CACHE_TIMEOUT)
+    return fragment
+
+
+def add_comment_controls(html, user):
+    """Подставляем ссылки управления в комментарии пользователя."""
+    def replace(match):
+        comment_id, author_id = match.groups()
+        if not user.is_authenticated or int(author_id) != user.pk:
+            return ''
+        return format_html(
+            CONTROLS,
+            reverse('news:edit', args=(comment_id,)),
+            reverse('news:delete', args=(comment_id,)),
+        )
+    return mark_safe(CONTROLS_MARKER.sub(replace, html))
@@ -0,0 +1,245 @@
+import json
+import time
+from collections import Counter
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_comments_version, bump_home_version, bump_news_version
+from .excerpts import make_excerpt
+from .models import Comment, News
+from .search import add_terms
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+# Один объект фикстуры длиннее этого числа символов — ошибка.
+MAX_OBJECT_SIZE = 1024 * 1024
+NEWS_MODEL = 'news.news'
+COMMENT_MODEL = 'news.comment'
+
+
+def skip_whitespace(buffer, position, chunks):
+    """Позиция следующего значимого символа, при необходимости дочитываем."""
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position < len(buffer):
+            return buffer, position
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError('Фикстура оборвана.')
+        buffer, position = chunk, 0
+
+
+def read_more(tail, chunks):
+    """
+    Дочитываем к недоразобранному хвосту не меньше его длины.
+
+    Хвост удваивается, поэтому повторные попытки разобрать длинный
+    объект в сумме линейны по его размеру. None — файл кончился.
+    """
+    parts = [tail]
+    size = len(tail)
+    while size < 2 * len(tail) or len(parts) == 1:
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        parts.append(chunk)
+        size += len(chunk)
+    return ''.join(parts) if len(parts) > 1 else None
+
+
+def iter_fixture_objects(stream, read_size=READ_SIZE,
+                         max_object_size=MAX_OBJECT_SIZE):
+    """
+    Выдаём объекты JSON-фикстуры по одному.
+
+    Файл читается кусками по read_size символов, в памяти держится
+    только текущий кусок и недоразобранный объект, а не весь массив.
+    Объект длиннее max_object_size символов (или битый объект,
+    который не кончается) прерывает загрузку с ValueError.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(partial(stream.read, read_size), '')
+    buffer, position = skip_whitespace('', 0, chunks)
+    if buffer[position] != '[':
+        raise ValueError('Фикстура должна быть JSON-массивом.')
+    position += 1
+    while True:
+        buffer, position = skip_whitespace(buffer, position, chunks)
+        if buffer[position] == ']':
+            return
+        if buffer[position] == ',':
+            position += 1
+            continue
+        try:
+            obj, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Объект оборвался на границе куска: дочитываем файл.
+            tail = buffer[position:]
+            if len(tail) > max_object_size:
+                raise ValueError(
+                    f'Объект фикстуры длиннее {max_object_size} символов.'
+                )
+            buffer = read_more(tail, chunks)
+            if buffer is None:
+                raise
+            position = 0
+            continue
+        yield obj
+
+
+class NewsIngester:
+    """
+    Загрузка новостей и комментариев из JSON-фикстуры.
+
+    Объекты сохраняются через bulk_create пачками по batch_size, каждая
+    пачка в своей транзакции. Новость с уже существующими заголовком
+    и датой не дублируется: комментарии из фикстуры привязываются
+    к найденной новости. В памяти между пачками хранится только
+    соответствие pk из фикстуры и id новостей в базе, и только для
+    новостей, у которых в фикстуре задан pk.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, on_reject=None):
+        self.batch_size = batch_size
+        self.on_reject = on_reject or (lambda number, reason: None)
+        self.news_ids = {}
+        self.news_batch = []
+        self.comments_batch = []
+        self.stats = Counter()
+
+    def run(self, stream):
+        start = time.perf_counter()
+        for number, obj in enumerate(iter_fixture_objects(stream), 1):
+            self.stats['rows'] += 1
+            if not isinstance(obj, dict):
+                self.reject(number, 'ожидается JSON-объект')
+                continue
+            model = str(obj.get('model')).lower()
+            if model == NEWS_MODEL:
+                self.add_news(number, obj)
+            elif model == COMMENT_MODEL:
+                self.add_comment(number, obj)
+            else:
+                self.reject(number, f'неизвестная модель {model}')
+        self.save_news()
+        self.save_comments()
+        self.stats['seconds'] = time.perf_counter() - start
+        return self.stats
+
+    def reject(self, number, reason):
+        self.stats['rejected'] += 1
+        self.on_reject(number, reason)
+
+    def add_news(self, number, obj):
+        fields = obj.get('fields', {})
+        text = fields.get('text', '')
+        news = News(
+            title=fields.get('title', ''), text=text,
+            excerpt=make_excerpt(text),
+        )
+        if fields.get('date'):
+            news.date = fields['date']
+        try:
+            news.clean_fields(exclude=('comment_count',))
+        except ValidationError as error:
+            self.reject(number, error.messages[0])
+            return
+        self.news_batch.append((obj.get('pk'), news))
+        if len(self.news_batch) >= self.batch_size:
+            self.save_news()
+
+    def add_comment(self, number, obj):
+        fields = obj.get('fields', {})
+        comment = Comment(
+            text=fields.get('text', ''), author_id=fields.get('author')
+        )
+        if fields.get('created'):
+            comment.created = fields['created']
+        try:
+            comment.clean_fields(exclude=('news', 'author'))
+        except ValidationError as error:
+            self.reject(number, error.messages[0])
+            return
+        if timezone.is_naive(comment.created):
+            comment.created = timezone.make_aware(comment.created)
+        self.comments_batch.append((number, fields.get('news'), comment))
+        if len(self.comments_batch) >= self.batch_size:
+            # Комментарий может ссылаться на новость из текущей пачки.
+            self.save_news()
+            self.save_comments()
+
+    def get_existing_ids(self, news_list):
+        """Id уже сохранённых новостей с теми же заголовком и датой."""
+        return {
+            (title, date): pk for pk, title, date in News.objects.filter(
+                title__in={news.title for news in news_list},
+                date__in={news.date for news in news_list},
+            ).values_list('pk', 'title', 'date').iterator()
+        }
+
+    def save_news(self):
+        if not self.news_batch:
+            return
+        batch, self.news_batch = self.news_batch, []
+        with transaction.atomic():
+            existing = self.get_existing_ids([news for _, news in batch])
+            new = {}
+            for _, news in batch:
+                key = (news.title, news.date)
+                if key in existing or key in new:
+                    self.stats['duplicates'] += 1
+                else:
+                    new[key] = news
+            News.objects.bulk_create(new.values())
+            # SQLite не возвращает id из bulk_create, выбираем их
+            # тем же запросом, что и дубликаты.
+            if new:
+                existing.update(self.get_existing_ids(new.values()))
+                for key, news in new.items():
+                    news.pk = existing[key]
+                # bulk_create не отправляет сигналы, индексируем сами.
+                add_terms(new.values())
+        for fixture_pk, news in batch:
+            if fixture_pk is not None:
+                self.news_ids[fixture_pk] = existing[(news.title, news.date)]
+        self.stats['news'] += len(new)
+        if new:
+            bump_home_version()
+
+    def save_comments(self):
+        if not self.comments_batch:
+            return
+        batch, self.comments_batch = self.comments_batch, []
+        authors = set(User.objects.filter(
+            pk__in={comment.author_id for _, _, comment in batch}
+        ).values_list('pk', flat=True))
+        comments = []
+        for number, fixture_news_pk, comment in batch:
+            if fixture_news_pk not in self.news_ids:
+                self.reject(number, f'нет новости {fixture_news_pk}')
+            elif comment.author_id not in authors:
+                self.reject(number, f'нет автора {comment.author_id}')
+            else:
+                comment.news_id = self.news_ids[fixture_news_pk]
+                comments.append(comment)
+        counts = Counter(comment.news_id for comment in comments)
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+            for news_id, count in counts.items():
+                News.objects.filter(pk=news_id).update(
+                    comment_count=F('comment_count') + count
+                )
+        self.stats['comments'] += len(comments)
+        for news_id in counts:
+            bump_comments_version(news_id)
+            bump_news_version(news_id)
+        if counts:
+            bump_home_version()
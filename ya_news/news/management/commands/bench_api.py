@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from news.models import Comment, News
+
+User = get_user_model()
+
+BENCH_USERNAME = 'bench-api'
+SERVER_NAME = 'localhost'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число запросов в секунду у HTML-страниц '
+        'и JSON API новостей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--comments', type=int, default=50,
+            help='Число комментариев в новости.'
+        )
+
+    def handle(self, *args, requests, comments, **options):
+        news = News.objects.create(title='Нагрузочный тест', text='Текст')
+        user = User.objects.create(username=BENCH_USERNAME)
+        Comment.objects.bulk_create(
+            Comment(news=news, author=user, text='Комментарий')
+            for _ in range(comments)
+        )
+        client = Client(SERVER_NAME=SERVER_NAME)
+        try:
+            for title, html_url, api_url in (
+                ('Список новостей', reverse('news:home'),
+                 reverse('news:api_news_list')),
+                ('Новость с комментариями',
+                 reverse('news:detail', args=(news.pk,)),
+                 reverse('news:api_comments', args=(news.pk,))),
+            ):
+                html = self.measure(client, html_url, requests)
+                api = self.measure(client, api_url, requests)
+                self.stdout.write(
+                    f'{title}: HTML {html:.0f} запросов/с, '
+                    f'API {api:.0f} запросов/с'
+                )
+        finally:
+            news.delete()
+            user.delete()
+
+    def measure(self, client, url, requests):
+        """
+        Запросов в секунду без кеша страниц.
+
+        Кеш сбрасывается перед каждым запросом, чтобы сравнивать
+        рендеринг, а не чтение готовой страницы.
+        """
+        elapsed = 0
+        for _ in range(requests):
+            cache.clear()
+            start = time.perf_counter()
+            client.get(url)
+            elapsed += time.perf_counter() - start
+        return requests / elapsed
@@ -0,0 +1,106 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test.utils import CaptureQueriesContext
+
+from news.models import Comment, News
+from news.pagination import get_comments_queryset
+
+User = get_user_model()
+
+BENCH_USERNAME_PREFIX = 'bench-comments-'
+BATCH_SIZE = 1000
+
+
+def count_fetched_bytes(queryset):
+    """Объём значений в строках, которые вернула база данных."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(
+            len(value) if isinstance(value, (str, bytes))
+            else len(str(value))
+            for row in cursor.fetchall() for value in row
+            if value is not None
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает загрузку ветки комментариев с полными строками '
+        'авторов и только с их id и именем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument(
+            '--users', type=int, default=2000,
+            help='Число разных авторов комментариев.'
+        )
+
+    def handle(self, *args, comments, users, **options):
+        news = News.objects.create(title='Нагрузочный тест', text='Текст')
+        try:
+            self.fill(news, comments, users)
+            for title, queryset in (
+                ('Полные строки', Comment.objects.filter(
+                    news=news
+                ).select_related('author').order_by('created', 'pk')),
+                ('Id и имя автора', get_comments_queryset(news.pk)),
+            ):
+                self.report(title, queryset)
+        finally:
+            news.delete()
+            User.objects.filter(
+                username__startswith=BENCH_USERNAME_PREFIX
+            ).delete()
+
+    def fill(self, news, comments, users):
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{BENCH_USERNAME_PREFIX}{index}',
+                    email=f'{BENCH_USERNAME_PREFIX}{index}@example.com',
+                    password='pbkdf2_sha256$260000$' + 'x' * 66,
+                ) for index in range(users)
+            ), batch_size=BATCH_SIZE
+        )
+        author_ids = list(User.objects.filter(
+            username__startswith=BENCH_USERNAME_PREFIX
+        ).values_list('pk', flat=True))
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    news=news, author_id=author_ids[index % len(author_ids)],
+                    text='Комментарий',
+                ) for index in range(comments)
+            ), batch_size=BATCH_SIZE
+        )
+
+    def report(self, title, queryset):
+        instances = 0
+
+        def count_instance(**kwargs):
+            nonlocal instances
+            instances += 1
+
+        post_init.connect(count_instance, weak=False)
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                thread = [
+                    (comment.author.username, comment.author_id)
+                    for comment in queryset.all()
+                ]
+                elapsed = time.perf_counter() - start
+        finally:
+            post_init.disconnect(count_instance)
+        self.stdout.write(
+            f'{title}: {len(thread)} комментариев, '
+            f'запросов {len(queries)}, '
+            f'байт {count_fetched_bytes(queryset)}, '
+            f'моделей {instances}, {elapsed * 1000:.1f} мс'
+        )
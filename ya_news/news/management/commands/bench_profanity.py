@@ -0,0 +1,64 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.profanity import BadWordsMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length=5, max_length=10):
+    return ''.join(
+        rng.choice(ALPHABET)
+        for _ in range(rng.randint(min_length, max_length))
+    )
+
+
+def substring_loop(words, text):
+    """Прежняя проверка: отдельный поиск подстроки для каждого слова."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает автомат запрещённых слов с поиском подстроки '
+        'для каждого слова.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=10_000)
+        parser.add_argument(
+            '--size', type=int, default=100_000,
+            help='Длина комментария в символах.'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, words, size, repeat, seed, **options):
+        rng = random.Random(seed)
+        bad_words = [random_word(rng) for _ in range(words)]
+        # Короткие слова почти не совпадают со случайными длинными,
+        # поэтому оба способа просматривают текст целиком.
+        text = ' '.join(
+            random_word(rng, 2, 4) for _ in range(size // 4)
+        )[:size]
+
+        start = time.perf_counter()
+        matcher = BadWordsMatcher(bad_words)
+        build = time.perf_counter() - start
+        self.stdout.write(f'Построение автомата: {build * 1000:.1f} мс')
+
+        for title, check in (
+            ('Поиск подстрок', lambda: substring_loop(bad_words, text)),
+            ('Автомат', lambda: matcher.search(text)),
+        ):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                check()
+            elapsed = (time.perf_counter() - start) / repeat
+            self.stdout.write(f'{title}: {elapsed * 1000:.1f} мс')
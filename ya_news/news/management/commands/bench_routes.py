@@ -0,0 +1,58 @@
+import itertools
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from common.benchmark import BenchRoutesCommand, Step, get_session_cookie
+from news.models import Comment, News
+
+User = get_user_model()
+
+BENCH_USERNAME = 'bench-routes'
+# Доли маршрутов в смеси: чтение преобладает над записью.
+HOME_WEIGHT = 10
+DETAIL_WEIGHT = 8
+COMMENT_WEIGHT = 2
+
+
+class Command(BenchRoutesCommand):
+    help = (
+        'Нагрузочный прогон смеси запросов к маршрутам новостей: '
+        'задержки p50/p95/p99 и запросы в секунду.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--comments', type=int, default=100,
+            help='Число комментариев в новости.'
+        )
+
+    @contextmanager
+    def prepare_mix(self, comments, **options):
+        news = News.objects.create(title='Нагрузочный тест', text='Текст')
+        user = User.objects.create(username=BENCH_USERNAME)
+        Comment.objects.bulk_create(
+            Comment(news=news, author=user, text='Комментарий')
+            for _ in range(comments)
+        )
+        try:
+            yield self.get_mix(news, user)
+        finally:
+            news.delete()
+            user.delete()
+
+    def get_mix(self, news, user):
+        detail_url = reverse('news:detail', args=(news.pk,))
+        numbers = itertools.count()
+        return (
+            (Step('news:home', 'GET', reverse('news:home'), None, None),
+             HOME_WEIGHT),
+            (Step('news:detail', 'GET', detail_url, None, None),
+             DETAIL_WEIGHT),
+            (Step('news:detail (POST)', 'POST', detail_url,
+                  lambda: {'text': f'Комментарий {next(numbers)}'},
+                  get_session_cookie(user)),
+             COMMENT_WEIGHT),
+        )
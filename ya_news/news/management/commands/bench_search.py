@@ -0,0 +1,111 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from news.excerpts import make_excerpt
+from news.models import News, NewsTerm
+from news.search import add_terms, rebuild_term_counts, search_news
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+BATCH_SIZE = 10_000
+PAGES = 10
+
+
+def random_word(rng, min_length=5, max_length=10):
+    return ''.join(
+        rng.choice(ALPHABET)
+        for _ in range(rng.randint(min_length, max_length))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время поиска новостей по обратному индексу '
+        'на первой и глубокой страницах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=1_000_000)
+        parser.add_argument(
+            '--vocabulary', type=int, default=50_000,
+            help='Число разных слов в новостях.'
+        )
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, news, vocabulary, queries, seed, **options):
+        rng = random.Random(seed)
+        words = [random_word(rng) for _ in range(vocabulary)]
+        # Частые слова встречаются в заметной доле новостей.
+        frequent = words[:20]
+        first_id = (News.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        start = time.perf_counter()
+        try:
+            self.fill(rng, words, frequent, first_id, news)
+            self.stdout.write(
+                f'Новостей: {news}, вставка с индексом: '
+                f'{time.perf_counter() - start:.1f} с'
+            )
+            for title, make_query in (
+                ('редкое слово', lambda: rng.choice(words)),
+                ('частое слово', lambda: rng.choice(frequent)),
+                ('частое и редкое слово', lambda: (
+                    f'{rng.choice(frequent)} {rng.choice(words)}'
+                )),
+                ('два частых слова', lambda: ' '.join(
+                    rng.sample(frequent, 2)
+                )),
+                ('три частых слова', lambda: ' '.join(
+                    rng.sample(frequent, 3)
+                )),
+            ):
+                self.measure(title, [make_query() for _ in range(queries)])
+        finally:
+            # Записи индекса удаляем заранее одним запросом, а число
+            # новостей по основам пересчитываем один раз в конце.
+            NewsTerm.objects.filter(news_id__gte=first_id).delete()
+            News.objects.filter(pk__gte=first_id).delete()
+            rebuild_term_counts()
+
+    def fill(self, rng, words, frequent, first_id, count):
+        today = date.today()
+        for offset in range(0, count, BATCH_SIZE):
+            batch = [
+                News(
+                    pk=first_id + index,
+                    title=' '.join(rng.choices(words, k=3)),
+                    text=' '.join(
+                        rng.choices(words, k=10) + rng.choices(frequent, k=2)
+                    ),
+                    date=today - timedelta(days=rng.randrange(3650)),
+                )
+                for index in range(offset, min(offset + BATCH_SIZE, count))
+            ]
+            for news in batch:
+                news.excerpt = make_excerpt(news.text)
+            with transaction.atomic():
+                News.objects.bulk_create(batch)
+                add_terms(batch)
+
+    def measure(self, title, query_list):
+        """Среднее время первой страницы и страницы номер PAGES."""
+        first_page = deep_page = 0
+        for query in query_list:
+            start = time.perf_counter()
+            _, cursor = search_news(query)
+            first_page += time.perf_counter() - start
+            for _ in range(PAGES - 1):
+                if cursor is None:
+                    break
+                start = time.perf_counter()
+                _, cursor = search_news(query, cursor)
+            deep_page += time.perf_counter() - start
+        self.stdout.write(
+            f'{title}: первая страница '
+            f'{first_page / len(query_list) * 1000:.1f} мс, '
+            f'страница {PAGES} {deep_page / len(query_list) * 1000:.1f} мс'
+        )
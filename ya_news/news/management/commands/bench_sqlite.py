@@ -0,0 +1,110 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.models import Comment, News
+
+User = get_user_model()
+
+# Настройки SQLite по умолчанию, режим журнала надо вернуть явно:
+# WAL сохраняется в файле базы данных.
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+BENCH_USERNAME = 'bench-writer-{}'
+SERVER_NAME = 'localhost'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает страницу новости параллельными читателями и писателями '
+        'с профилем SQLite и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность каждого прогона, секунд.'
+        )
+        parser.add_argument(
+            '--comments', type=int, default=100,
+            help='Число комментариев в новости перед прогоном.'
+        )
+
+    def handle(self, *args, readers, writers, duration, comments,
+               **options):
+        news = News.objects.create(title='Нагрузочный тест', text='Текст')
+        users = [
+            User.objects.create(username=BENCH_USERNAME.format(index))
+            for index in range(writers)
+        ]
+        Comment.objects.bulk_create(
+            Comment(news=news, author=users[0], text='Текст')
+            for _ in range(comments)
+        )
+        url = reverse('news:detail', args=(news.pk,))
+        profiles = (
+            ('без профиля', DEFAULT_PRAGMAS),
+            ('с профилем', settings.SQLITE_PRAGMAS),
+        )
+        try:
+            for title, pragmas in profiles:
+                connection.close()
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    stats = self.run(url, users, readers, duration)
+                self.stdout.write(
+                    f'{title}: чтений {stats["reads"] / duration:.1f}/с, '
+                    f'записей {stats["writes"] / duration:.1f}/с, '
+                    f'ошибок блокировки {stats["locked"]}'
+                )
+        finally:
+            news.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run(self, url, users, readers, duration):
+        """Запускает потоки и собирает счётчики."""
+        stats = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(
+                target=self.worker, args=(url, None, deadline, stats, lock)
+            ) for _ in range(readers)
+        ] + [
+            threading.Thread(
+                target=self.worker, args=(url, user, deadline, stats, lock)
+            ) for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return stats
+
+    def worker(self, url, user, deadline, stats, lock):
+        """Читает страницу новости или пишет комментарии до дедлайна."""
+        client = Client(SERVER_NAME=SERVER_NAME)
+        counter = 'reads' if user is None else 'writes'
+        try:
+            if user is not None:
+                client.force_login(user)
+            while time.perf_counter() < deadline:
+                try:
+                    if user is None:
+                        client.get(url)
+                    else:
+                        client.post(url, data={'text': 'Комментарий'})
+                except OperationalError:
+                    with lock:
+                        stats['locked'] += 1
+                    continue
+                with lock:
+                    stats[counter] += 1
+        finally:
+            connection.close()
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.ingest import DEFAULT_BATCH_SIZE, NewsIngester
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает новости и комментарии из JSON-фикстуры пачками, '
+        'не читая файл в память целиком и пропуская дубликаты новостей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество объектов в одной транзакции.'
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        ingester = NewsIngester(
+            batch_size,
+            on_reject=lambda number, reason: self.stderr.write(
+                f'Объект {number}: {reason}'
+            )
+        )
+        with open(path, encoding='utf-8') as stream:
+            try:
+                stats = ingester.run(stream)
+            except ValueError as error:
+                raise CommandError(f'Загрузка прервана: {error}')
+        seconds = stats['seconds'] or 1e-9
+        self.stdout.write(
+            f'Объектов: {stats["rows"]}, новостей: {stats["news"]}, '
+            f'дубликатов: {stats["duplicates"]}, '
+            f'комментариев: {stats["comments"]}, '
+            f'отклонено: {stats["rejected"]}. '
+            f'{stats["rows"] / seconds:.0f} объектов/с.'
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.search import rebuild_index
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество новостей, обрабатываемых за один проход.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        with transaction.atomic():
+            total = rebuild_index(batch_size)
+        self.stdout.write(f'Проиндексировано новостей: {total}')
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from news.models import Comment, News
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество новостей, обрабатываемых за один проход.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        fixed = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    News.objects.filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .only('pk', 'comment_count')[:batch_size]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+                counts = dict(
+                    Comment.objects.filter(news__in=batch)
+                    .values('news')
+                    .annotate(count=Count('pk'))
+                    .values_list('news', 'count')
+                )
+                changed = []
+                for news in batch:
+                    actual = counts.get(news.pk, 0)
+                    if news.comment_count != actual:
+                        news.comment_count = actual
+                        changed.append(news)
+                News.objects.bulk_update(changed, ('comment_count',))
+                fixed += len(changed)
+        self.stdout.write(f'Исправлено счётчиков: {fixed}')
@@ -0,0 +1,94 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+import re
+from collections import Counter
+
+# Копия правил news.search на момент миграции: миграция
+# не должна меняться вместе с кодом приложения.
+WORD = re.compile(r'\w+')
+MIN_STEM_LENGTH = 3
+MAX_TERM_LENGTH = 50
+TITLE_WEIGHT = 3
+BATCH_SIZE = 1000
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'иях', 'ях', 'ах', 'ией', 'ей', 'ой', 'ий', 'ый',
+    'ым', 'им', 'ом', 'ем', 'ам', 'ям', 'ов', 'ев', 'ыми', 'ими', 'ого',
+    'его', 'ому', 'ему', 'ых', 'их', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие',
+    'ую', 'юю', 'ия', 'ья', 'ье', 'ию', 'ью', 'ться', 'тся', 'ешь',
+    'ете', 'ить', 'ать', 'ять', 'еть', 'а', 'е', 'и', 'й', 'о', 'у',
+    'ы', 'ь', 'ю', 'я',
+), key=len, reverse=True)
+STOP_WORDS = frozenset((
+    'а', 'без', 'в', 'во', 'да', 'для', 'до', 'же', 'за', 'и', 'из', 'или',
+    'к', 'как', 'ко', 'ли', 'на', 'над', 'не', 'ни', 'но', 'о', 'об', 'от',
+    'по', 'под', 'при', 'про', 'с', 'со', 'то', 'у', 'что', 'это',
+))
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    for ending in ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)][:MAX_TERM_LENGTH]
+    return word[:MAX_TERM_LENGTH]
+
+
+def get_terms(text):
+    return [
+        stem(word) for word in WORD.findall(text)
+        if word.lower() not in STOP_WORDS
+    ]
+
+
+def fill_search_index(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    NewsTerm = apps.get_model('news', 'NewsTerm')
+    last_id = 0
+    while True:
+        batch = list(
+            News.objects.filter(pk__gt=last_id).order_by('pk')
+            .only('pk', 'title', 'text', 'date')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        terms = []
+        for news in batch:
+            weights = Counter(get_terms(news.text))
+            for term in get_terms(news.title):
+                weights[term] += TITLE_WEIGHT
+            terms += [
+                NewsTerm(term=term, news_id=news.pk, weight=weight,
+                         date=news.date)
+                for term, weight in weights.items()
+            ]
+        NewsTerm.objects.bulk_create(terms)
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='news.news')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='newsterm',
+            index=models.Index(fields=['term', '-weight', '-date', '-news'], name='news_term_rank_idx'),
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:02
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+# Копия news.excerpts на момент миграции.
+EXCERPT_WORDS = 15
+EXCERPT_MAX_LENGTH = 300
+
+
+def make_excerpt(text):
+    return Truncator(
+        Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    ).chars(EXCERPT_MAX_LENGTH)
+
+
+def fill_excerpt(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    last_id = 0
+    while True:
+        batch = list(
+            News.objects.filter(pk__gt=last_id).order_by('pk')
+            .only('pk', 'text')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for news in batch:
+            news.excerpt = make_excerpt(news.text)
+        News.objects.bulk_update(batch, ('excerpt',))
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(fill_excerpt, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsterm',
+            index=models.Index(fields=['news', 'term', 'weight'], name='news_term_news_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:05
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def count_terms(apps, schema_editor):
+    NewsTerm = apps.get_model('news', 'NewsTerm')
+    SearchTerm = apps.get_model('news', 'SearchTerm')
+    SearchTerm.objects.bulk_create(
+        (
+            SearchTerm(term=term, news_count=news_count)
+            for term, news_count in NewsTerm.objects.values_list(
+                'term'
+            ).annotate(models.Count('id')).order_by().iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_comment_created_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50, unique=True)),
+                ('news_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_terms, migrations.RunPython.noop),
+    ]
@@ -2,21 +2,42 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from .excerpts import EXCERPT_MAX_LENGTH, make_excerpt
+
+# Поля новости, которые нужны спискам: полный текст в них не читается.
+NEWS_LIST_FIELDS = ('pk', 'title', 'date', 'excerpt', 'comment_count')
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
+    excerpt = models.CharField(
+        max_length=EXCERPT_MAX_LENGTH, blank=True, editable=False
+    )
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-id')
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """Пересчитываем начало текста для списков при каждом сохранении."""
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -28,10 +49,65 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    # Не auto_now_add: загрузка из фикстуры сохраняет исходное время.
+    created = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class NewsTerm(models.Model):
+    """
+    Запись обратного индекса поиска: основа слова в новости.
+
+    Вес учитывает число вхождений в заголовок и текст, дата новости
+    продублирована, чтобы ранжировать выдачу без обращения к News.
+    """
+    term = models.CharField(max_length=50)
+    news = models.ForeignKey(
+        News,
+        on_delete=models.CASCADE,
+        related_name='terms'
+    )
+    weight = models.PositiveIntegerField()
+    date = models.DateField()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('term', '-weight', '-date', '-news'),
+                name='news_term_rank_idx'
+            ),
+            # Остальные слова запроса по нескольким словам
+            # ищутся в новостях самого редкого слова.
+            models.Index(
+                fields=('news', 'term', 'weight'),
+                name='news_term_news_idx'
+            ),
+        )
+
+    def __str__(self):
+        return self.term
+
+
+class SearchTerm(models.Model):
+    """
+    Число новостей с основой слова.
+
+    Поиск по нескольким словам выбирает по нему самое редкое слово
+    одним запросом, не пересчитывая записи индекса.
+    """
+    term = models.CharField(max_length=50, unique=True)
+    news_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return self.term
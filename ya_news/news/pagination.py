@@ -0,0 +1,136 @@
+import base64
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.urls import reverse
+
+from .models import Comment
+
+CURSOR_PARAM = 'after'
+CURSOR_SEPARATOR = '|'
+# Поля, которые нужны ветке комментариев: от автора только имя,
+# без пароля, почты и флагов прав.
+COMMENT_FIELDS = ('news', 'text', 'created', 'author__username')
+
+
+def encode_cursor(created, pk):
+    """Упаковываем ключ комментария (created, id) в строку для URL."""
+    raw = f'{created.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Распаковываем курсор, некорректный курсор даёт 404."""
+    try:
+        created, pk = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split(CURSOR_SEPARATOR)
+        return datetime.fromisoformat(created), int(pk)
+    except ValueError:
+        raise Http404('Некорректный курсор комментариев.')
+
+
+def get_comments_queryset(news_id):
+    """
+    Комментарии новости в порядке (created, id).
+
+    Автор выбирается тем же запросом, но только id и имя.
+    """
+    return Comment.objects.filter(
+        news_id=news_id
+    ).select_related('author').only(
+        *COMMENT_FIELDS
+    ).order_by('created', 'pk')
+
+
+def get_comments_page_queryset(news_id, cursor=None):
+    """
+    Запрос страницы комментариев, начиная с курсора.
+
+    Страница выбирается по ключу (created, id), поэтому её стоимость
+    не зависит от того, насколько далеко она от начала ветки.
+    Выбирается на один комментарий больше размера страницы,
+    чтобы понять, есть ли следующая.
+    """
+    queryset = get_comments_queryset(news_id)
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    return queryset[:settings.COMMENTS_COUNT_ON_DETAIL_PAGE + 1]
+
+
+def get_comments_page(news_id, cursor=None):
+    """Возвращаем страницу комментариев и курсор следующей страницы."""
+    size = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    comments = list(get_comments_page_queryset(news_id, cursor))
+    if len(comments) <= size:
+        return comments, None
+    comments = comments[:size]
+    return comments, encode_cursor(comments[-1].created, comments[-1].pk)
+
+
+def get_previous_comments_queryset(comment):
+    """Ключи комментариев, предшествующих данному, от ближайшего."""
+    return Comment.objects.filter(news_id=comment.news_id).filter(
+        Q(created__lt=comment.created)
+        | Q(created=comment.created, pk__lt=comment.pk)
+    ).order_by('-created', '-pk').values_list(
+        'created', 'pk'
+    )[:settings.COMMENTS_COUNT_ON_DETAIL_PAGE]
+
+
+def get_comment_cursor(comment):
+    """
+    Курсор страницы, которая начинается с данного комментария.
+
+    Если комментарий попадает на первую страницу, курсор не нужен.
+    """
+    previous = list(get_previous_comments_queryset(comment))
+    if len(previous) < settings.COMMENTS_COUNT_ON_DETAIL_PAGE:
+        return None
+    return encode_cursor(*previous[0])
+
+
+def get_latest_comments(news_id):
+    """
+    Последние комментарии новости, от новых к старым, с курсором страницы.
+
+    Курсор страницы, которая начинается с комментария, — ключ
+    предыдущего комментария, если перед комментарием набирается
+    целая страница. Ключи на две страницы назад выбираются одним
+    запросом, и курсоры всех комментариев считаются за один проход
+    вместо запроса на каждый комментарий.
+    """
+    size = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    keys = list(Comment.objects.filter(news_id=news_id).order_by(
+        '-created', '-pk'
+    ).values_list('created', 'pk')[:2 * size])
+    comments = get_comments_queryset(news_id).filter(
+        pk__in=[pk for _, pk in keys[:size]]
+    ).order_by('-created', '-pk')
+    for index, comment in enumerate(comments):
+        comment.page_cursor = (
+            encode_cursor(*keys[index + 1])
+            if len(keys) - index - 1 >= size else None
+        )
+    return comments
+
+
+def get_comments_url(news_id, cursor=None, anchor='comments'):
+    """Адрес блока комментариев новости, начиная с курсора."""
+    url = reverse('news:detail', kwargs={'pk': news_id})
+    if cursor:
+        url += '?' + urlencode({CURSOR_PARAM: cursor})
+    return f'{url}#{anchor}'
+
+
+def get_comment_page_url(comment, anchor='comments'):
+    """Адрес страницы, на которой находится комментарий."""
+    return get_comments_url(
+        comment.news_id, get_comment_cursor(comment), anchor
+    )
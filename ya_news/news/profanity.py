@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+
+# Латинские буквы, которые выглядят как кириллические.
+LOOKALIKES = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+})
+
+
+def normalize(text):
+    """Приводим текст к нижнему регистру и кириллическому написанию."""
+    return text.lower().translate(LOOKALIKES)
+
+
+class BadWordsMatcher:
+    """
+    Автомат Ахо — Корасик для поиска запрещённых слов.
+
+    Строится один раз и находит все слова за один проход по тексту,
+    время поиска не зависит от длины списка слов.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.outputs = [()]
+        for word in {normalize(word) for word in words if word}:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            if char not in self.transitions[state]:
+                self.transitions.append({})
+                self.outputs.append(())
+                self.transitions[state][char] = len(self.transitions) - 1
+            state = self.transitions[state][char]
+        self.outputs[state] = (word,)
+
+    def _link(self):
+        """Строим ссылки неудач обходом бора в ширину."""
+        self.fails = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self.transitions[state].items():
+                fail = self.fails[state]
+                while fail and char not in self.transitions[fail]:
+                    fail = self.fails[fail]
+                self.fails[target] = self.transitions[fail].get(char, 0)
+                self.outputs[target] += self.outputs[self.fails[target]]
+                queue.append(target)
+
+    def _scan(self, text):
+        """Выдаём найденные слова по мере прохода по тексту."""
+        transitions = self.transitions
+        fails = self.fails
+        outputs = self.outputs
+        state = 0
+        for char in normalize(text):
+            while state and char not in transitions[state]:
+                state = fails[state]
+            state = transitions[state].get(char, 0)
+            yield from outputs[state]
+
+    def search(self, text):
+        """Первое найденное запрещённое слово или None."""
+        return next(self._scan(text), None)
+
+    def find_all(self, text):
+        """Все запрещённые слова, встретившиеся в тексте."""
+        return set(self._scan(text))
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_matcher = None
+_matcher_source = None
+
+
+def read_words(path):
+    """Слова из файла: по одному в строке, строки с # пропускаются."""
+    with open(path, encoding='utf-8') as words_file:
+        return [
+            line.strip() for line in words_file
+            if line.strip() and not line.startswith('#')
+        ]
+
+
+def get_file_version(path):
+    """Время изменения файла или None, если файл недоступен."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def build_matcher(default_words, path):
+    """
+    Автомат для слов по умолчанию и слов из файла.
+
+    Если файл не читается, остаётся прежний автомат для того же
+    файла, а если его нет — автомат без слов из файла.
+    """
+    words = list(default_words)
+    if path:
+        try:
+            words += read_words(path)
+        except (OSError, UnicodeDecodeError) as error:
+            logger.warning('BAD_WORDS_FILE не прочитан: %s', error)
+            if _matcher_source and _matcher_source[:2] == (
+                tuple(default_words), path
+            ):
+                return _matcher
+    return BadWordsMatcher(words)
+
+
+def get_bad_words_matcher(default_words):
+    """
+    Автомат для списка запрещённых слов.
+
+    Если в настройках задан BAD_WORDS_FILE, к словам по умолчанию
+    добавляются слова из файла; при изменении файла автомат
+    перестраивается без перезапуска сервера. Удалённый или
+    нечитаемый файл не ломает проверку комментариев.
+    """
+    global _matcher, _matcher_source
+    path = getattr(settings, 'BAD_WORDS_FILE', None)
+    source = (tuple(default_words), path, path and get_file_version(path))
+    if source != _matcher_source:
+        with _lock:
+            if source != _matcher_source:
+                _matcher = build_matcher(default_words, path)
+                _matcher_source = source
+    return _matcher
@@ -1,12 +1,38 @@
 from datetime import datetime, timedelta
 
 import pytest
+from common.query_budget import Budget, QueryBudget
 from django.conf import settings
+from django.core.cache import cache
 from django.test.client import Client
 from django.urls import reverse
 from django.utils import timezone
 from news.models import Comment, News
 
+COMMENTS_THREAD_SIZE = 10
+COMMENTS_PAGE_SIZE = 3
+SEARCH_RESULTS_SIZE = 7
+SEARCH_PAGE_SIZE = 3
+
+QUERY_BUDGET = QueryBudget({
+    'news:home': Budget(queries=1, milliseconds=300),
+    'news:detail': Budget(queries=2, milliseconds=300),
+    'news:edit': Budget(queries=3, milliseconds=300),
+    'news:delete': Budget(queries=3, milliseconds=300),
+})
+
+
+query_budget = QUERY_BUDGET.fixture()
+
+
+def pytest_terminal_summary(terminalreporter):
+    QUERY_BUDGET.write_summary(terminalreporter)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
 
 @pytest.fixture
 def author(django_user_model):
@@ -18,6 +44,18 @@ def reader(django_user_model):
     return django_user_model.objects.create(username='Читатель')
 
 
+@pytest.fixture
+def staff(django_user_model):
+    return django_user_model.objects.create(username='Редактор', is_staff=True)
+
+
+@pytest.fixture
+def staff_client(staff):
+    client = Client()
+    client.force_login(staff)
+    return client
+
+
 @pytest.fixture
 def author_client(author):
     client = Client()
@@ -47,6 +85,24 @@ def news_collection():
              ) for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1))
 
 
+@pytest.fixture
+def search_results():
+    """Новости со словом «выборы», от более к менее релевантным."""
+    today = datetime.today()
+    return [
+        News.objects.create(
+            title=f'Выборы {index}', text='Текст',
+            date=today - timedelta(days=index)
+        ) for index in range(SEARCH_RESULTS_SIZE)
+    ]
+
+
+@pytest.fixture
+def search_page_size(settings):
+    settings.NEWS_COUNT_ON_SEARCH_PAGE = SEARCH_PAGE_SIZE
+    return SEARCH_PAGE_SIZE
+
+
 @pytest.fixture
 def comment(author, news):
     return Comment.objects.create(news=news,
@@ -65,11 +121,71 @@ def comments_collection(news, author):
         comment.save()
 
 
+@pytest.fixture
+def comments_thread(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(COMMENTS_THREAD_SIZE)
+    )
+    return list(news.comment_set.order_by('created', 'id'))
+
+
+@pytest.fixture
+def comments_page_size(settings):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = COMMENTS_PAGE_SIZE
+    return COMMENTS_PAGE_SIZE
+
+
 @pytest.fixture
 def news_home_url():
     return reverse('news:home')
 
 
+@pytest.fixture
+def news_search_url():
+    return reverse('news:search')
+
+
+@pytest.fixture
+def metrics_url():
+    return reverse('news:metrics')
+
+
+@pytest.fixture
+def feed_rss_url():
+    return reverse('news:feed_rss')
+
+
+@pytest.fixture
+def feed_atom_url():
+    return reverse('news:feed_atom')
+
+
+@pytest.fixture
+def comments_feed_rss_url(news):
+    return reverse('news:comments_feed_rss', args=(news.id,))
+
+
+@pytest.fixture
+def comments_feed_atom_url(news):
+    return reverse('news:comments_feed_atom', args=(news.id,))
+
+
+@pytest.fixture
+def api_news_list_url():
+    return reverse('news:api_news_list')
+
+
+@pytest.fixture
+def api_news_detail_url(news):
+    return reverse('news:api_news_detail', args=(news.id,))
+
+
+@pytest.fixture
+def api_comments_url(news):
+    return reverse('news:api_comments', args=(news.id,))
+
+
 @pytest.fixture
 def users_login_url():
     return reverse('users:login')
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+API_PAGE_SIZE = 4
+API_NEWS_LIST_URL = pytest.lazy_fixture('api_news_list_url')
+API_COMMENTS_URL = pytest.lazy_fixture('api_comments_url')
+
+
+@pytest.fixture
+def api_page_size(settings):
+    settings.NEWS_COUNT_ON_HOME_PAGE = API_PAGE_SIZE
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = API_PAGE_SIZE
+    return API_PAGE_SIZE
+
+
+def get_all_pages(client, url):
+    """Обходит страницы по ссылке next, возвращает результаты и запросы."""
+    results = []
+    queries_per_page = set()
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        queries_per_page.add(len(queries))
+        data = response.json()
+        assert len(data['results']) <= API_PAGE_SIZE
+        results.extend(data['results'])
+        url = data['next']
+    return results, queries_per_page
+
+
+def test_news_list_pages(client, api_news_list_url, news_collection,
+                         api_page_size):
+    """
+    Тест проверяет, что список новостей выводится страницами
+    по курсору (date, id) одним запросом на страницу.
+    """
+    results, queries_per_page = get_all_pages(client, api_news_list_url)
+    assert [item['id'] for item in results] == list(
+        News.objects.order_by('-date', '-pk').values_list('pk', flat=True)
+    )
+    assert queries_per_page == {1}
+
+
+def test_comments_pages(client, api_comments_url, comments_thread,
+                        api_page_size):
+    """
+    Тест проверяет, что ветка комментариев выводится страницами
+    по курсору (created, id) без пропусков и повторов.
+    """
+    results, queries_per_page = get_all_pages(client, api_comments_url)
+    assert [item['id'] for item in results] == [
+        comment.pk for comment in comments_thread
+    ]
+    assert results[0]['author'] == comments_thread[0].author.username
+    assert queries_per_page == {1}
+
+
+@pytest.mark.parametrize('url', (API_NEWS_LIST_URL, API_COMMENTS_URL))
+def test_fields_selection(client, url, comment):
+    """Тест проверяет, что в ответе только запрошенные поля."""
+    data = client.get(url, {'fields': 'text,id'}).json()
+    assert list(data['results'][0]) == ['text', 'id']
+
+
+def test_news_detail(client, api_news_detail_url, news):
+    """Тест проверяет ответ с одной новостью."""
+    assert client.get(api_news_detail_url, {'fields': 'title'}).json() == {
+        'title': news.title
+    }
+
+
+@pytest.mark.parametrize('params, expected_status', (
+    ({'fields': 'title,password'}, HTTPStatus.BAD_REQUEST),
+    ({'fields': ','}, HTTPStatus.BAD_REQUEST),
+    ({'after': 'broken'}, HTTPStatus.BAD_REQUEST),
+))
+def test_bad_requests(client, api_news_list_url, params, expected_status):
+    """Тест проверяет ошибки в параметрах запроса."""
+    response = client.get(api_news_list_url, params)
+    assert response.status_code == expected_status
+    assert 'error' in response.json()
+
+
+@pytest.mark.parametrize('name', ('news:api_news_detail', 'news:api_comments'))
+def test_missing_news(client, name):
+    """Тест проверяет, что несуществующая новость даёт 404 в JSON."""
+    response = client.get(reverse(name, args=(0,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert 'error' in response.json()
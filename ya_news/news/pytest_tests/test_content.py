@@ -1,9 +1,40 @@
+import tracemalloc
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import escape
 from news.forms import CommentForm
+from news.models import Comment, News
+from news.pagination import get_comment_page_url
 
 pytestmark = pytest.mark.django_db
 
+COMMENTS_GROWTH = 2000
+LONG_COMMENT_TEXT = 'Очень длинный комментарий. ' * 40
+LONG_NEWS_TEXT = 'Очень длинная статья. ' * 20000
+MEMORY_GROWTH_LIMIT = 256 * 1024
+
+
+def measure_page(client, url):
+    """
+    Возвращает число SQL-запросов и пик памяти
+    при рендеринге страницы без кеша.
+    """
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        try:
+            client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return len(queries), peak
+
 
 def test_news_count(client, news_home_url, news_collection):
     """
@@ -24,7 +55,46 @@ def test_news_order(client, news_home_url):
     assert all_dates == sorted(all_dates, reverse=True)
 
 
-def test_comments_order(client, news_detail_url):
+def test_home_page_cost_does_not_grow_with_comments(
+    client, news_home_url, news, author
+):
+    """
+    Тест проверяет, что число запросов и расход памяти
+    при загрузке главной страницы не растут с числом комментариев.
+    """
+    Comment.objects.create(news=news, author=author, text='Текст')
+    client.get(news_home_url)
+    queries_before, peak_before = measure_page(client, news_home_url)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=LONG_COMMENT_TEXT)
+        for _ in range(COMMENTS_GROWTH)
+    )
+    News.objects.filter(pk=news.pk).update(
+        comment_count=F('comment_count') + COMMENTS_GROWTH
+    )
+    queries_after, peak_after = measure_page(client, news_home_url)
+    assert queries_after == queries_before
+    assert peak_after - peak_before < MEMORY_GROWTH_LIMIT
+    assert (f'Комментариев: {COMMENTS_GROWTH + 1}'
+            in client.get(news_home_url).content.decode())
+
+
+def test_home_page_does_not_read_news_text(client, news_home_url, news):
+    """
+    Тест проверяет, что главная страница выводит сохранённое начало
+    текста и не читает из базы данных полный текст новостей.
+    """
+    news.text = LONG_NEWS_TEXT
+    news.save()
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get(news_home_url).content.decode()
+    assert news.excerpt in content
+    assert len(content) < len(LONG_NEWS_TEXT)
+    assert not [query for query in queries
+                if '"news_news"."text"' in query['sql']]
+
+
+def test_comments_order(client, news_detail_url, comments_collection):
     """
     Тест для проверки сортировки отображаемых
     коментариев (от старых к новым).
@@ -32,10 +102,148 @@ def test_comments_order(client, news_detail_url):
     response = client.get(news_detail_url)
     assert 'news' in response.context
     all_timestamps = [comment.created for comment in
-                      response.context['news'].comment_set.all()]
+                      response.context['comments']]
     assert all_timestamps == sorted(all_timestamps)
 
 
+def test_comments_pages(client, news_detail_url, comments_thread,
+                        comments_page_size):
+    """
+    Тест проверяет, что ветка комментариев выводится страницами
+    по курсору без пропусков и повторов, а стоимость страницы
+    не зависит от её глубины.
+    """
+    shown = []
+    queries_per_page = set()
+    url = news_detail_url
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        queries_per_page.add(len(queries))
+        comments = response.context['comments']
+        assert len(comments) <= comments_page_size
+        shown.extend(comments)
+        next_cursor = response.context['next_cursor']
+        url = next_cursor and f'{news_detail_url}?after={next_cursor}'
+    assert shown == comments_thread
+    assert len(queries_per_page) == 1
+
+
+def test_comment_authors_loaded_narrow(client, news_detail_url, comment):
+    """
+    Тест проверяет, что комментарии выбираются вместе с авторами
+    одним запросом, без пароля и почты авторов.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get(news_detail_url).content.decode()
+    assert comment.author.username in content
+    comment_queries = [query['sql'] for query in queries
+                       if 'news_comment' in query['sql']]
+    assert len(comment_queries) == 1
+    assert 'auth_user' in comment_queries[0]
+    assert '"password"' not in comment_queries[0]
+    assert '"email"' not in comment_queries[0]
+
+
+def test_invalid_comments_cursor(client, news_detail_url):
+    """Тест проверяет, что некорректный курсор приводит к 404."""
+    assert (client.get(f'{news_detail_url}?after=broken').status_code
+            == HTTPStatus.NOT_FOUND)
+
+
+def test_search_ranking(client, news_search_url, news):
+    """
+    Тест проверяет, что совпадение в заголовке выше совпадения
+    в тексте, при равном весе новая новость выше старой, а слово
+    находится в другой форме.
+    """
+    in_text = News.objects.create(
+        title='Итоги недели', text='Прошли выборы', date='2022-10-01'
+    )
+    older = News.objects.create(
+        title='Выборов не будет', text='Текст', date='2022-10-01'
+    )
+    newer = News.objects.create(
+        title='Выборам быть', text='Текст', date='2022-11-01'
+    )
+    results = client.get(news_search_url, {'q': 'выборы'}).context['results']
+    assert results == [newer, older, in_text]
+
+
+def test_search_several_words(client, news_search_url, search_results,
+                              search_page_size):
+    """
+    Тест проверяет, что по нескольким словам находятся только
+    новости со всеми словами в порядке веса самого редкого слова,
+    а страницы идут по курсору без пропусков и повторов.
+    """
+    News.objects.create(title='Итоги', text='Текст', date='2022-10-01')
+    best = News.objects.create(
+        title='Итоги выборов', text='Итоги', date='2022-10-01'
+    )
+    in_text = News.objects.create(
+        title='Выборы', text='Подвели итоги', date='2022-11-01'
+    )
+    shown = []
+    url = f'{news_search_url}?q=итоги выборов'
+    while url:
+        response = client.get(url)
+        shown.extend(response.context['results'])
+        url = response.context.get('next_url')
+    assert shown == [best, in_text]
+
+
+def test_search_pages(client, news_search_url, search_results,
+                      search_page_size):
+    """
+    Тест проверяет, что результаты поиска выводятся страницами
+    по курсору без пропусков и повторов, а стоимость страницы
+    не зависит от её глубины.
+    """
+    shown = []
+    queries_per_page = set()
+    url = f'{news_search_url}?q=выборы'
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        queries_per_page.add(len(queries))
+        assert len(response.context['results']) <= search_page_size
+        shown.extend(response.context['results'])
+        url = response.context.get('next_url')
+    assert shown == search_results
+    assert len(queries_per_page) == 1
+
+
+def test_search_frequent_words_pages(client, news_search_url,
+                                     search_results, search_page_size):
+    """
+    Тест проверяет, что по двум словам, которые есть в каждой
+    новости, страницы идут без пропусков и повторов, а стоимость
+    страницы не зависит от её глубины.
+    """
+    for news in search_results:
+        news.text = 'Итоги'
+        news.save()
+    shown = []
+    queries_per_page = set()
+    url = f'{news_search_url}?q=итоги выборов'
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        queries_per_page.add(len(queries))
+        shown.extend(response.context['results'])
+        url = response.context.get('next_url')
+    assert shown == search_results
+    assert len(queries_per_page) == 1
+
+
+def test_invalid_search_cursor(client, news_search_url):
+    """Тест проверяет, что некорректный курсор поиска приводит к 404."""
+    assert client.get(
+        news_search_url, {'q': 'выборы', 'after': 'broken'}
+    ).status_code == HTTPStatus.NOT_FOUND
+
+
 def test_authorized_user_has_form(news_detail_url, reader_client):
     """
     Тест для проверки, что только авторизованному пользователю на
@@ -51,3 +259,270 @@ def test_anonymous_user_does_not_have_form(news_detail_url, client):
     странице новости не видит форму для создания комментариев.
     """
     assert 'form' not in client.get(news_detail_url).context
+
+
+@pytest.mark.parametrize('url', (
+    pytest.lazy_fixture('news_home_url'),
+    pytest.lazy_fixture('news_detail_url'),
+))
+def test_anonymous_page_served_from_cache(client, url,
+                                          django_assert_num_queries):
+    """
+    Тест проверяет, что повторный анонимный запрос страницы
+    обслуживается из кеша без обращения к базе данных.
+    """
+    content = client.get(url).content
+    with django_assert_num_queries(0):
+        assert client.get(url).content == content
+
+
+def test_authenticated_page_not_cached(reader_client, news_detail_url):
+    """
+    Тест проверяет, что авторизованному пользователю
+    страница не отдаётся из кеша.
+    """
+    reader_client.get(news_detail_url)
+    assert isinstance(
+        reader_client.get(news_detail_url).context.get('form'), CommentForm
+    )
+
+
+def test_cached_pages_invalidated_on_change(
+        client, reader_client, news, news_home_url, news_detail_url,
+        django_capture_on_commit_callbacks
+):
+    """
+    Тест проверяет, что новый комментарий и изменение новости
+    сразу видны на закешированных страницах.
+    """
+    client.get(news_home_url)
+    client.get(news_detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        reader_client.post(news_detail_url,
+                           data={'text': 'Свежий комментарий'})
+    assert 'Свежий комментарий' in client.get(news_detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(news_home_url).content.decode()
+    news.title = 'Новый заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    assert 'Новый заголовок' in client.get(news_home_url).content.decode()
+    assert 'Новый заголовок' in client.get(news_detail_url).content.decode()
+
+
+def test_cached_pages_kept_until_commit(client, news, news_detail_url,
+                                        django_capture_on_commit_callbacks):
+    """
+    Тест проверяет, что версия страниц меняется только после
+    фиксации транзакции, а откаченное изменение её не меняет.
+    """
+    client.get(news_detail_url)
+    with django_capture_on_commit_callbacks() as callbacks:
+        with transaction.atomic():
+            news.title = 'Откаченный заголовок'
+            news.save()
+            transaction.set_rollback(True)
+    assert not callbacks
+    news.title = 'Новый заголовок'
+    with django_capture_on_commit_callbacks() as callbacks:
+        news.save()
+        assert 'Новый заголовок' not in client.get(
+            news_detail_url
+        ).content.decode()
+    for callback in callbacks:
+        callback()
+    assert 'Новый заголовок' in client.get(news_detail_url).content.decode()
+
+
+def test_cached_page_ignores_unknown_params(client, news_detail_url):
+    """
+    Тест проверяет, что параметры, которые страница не читает,
+    не заводят новых копий страницы в кеше.
+    """
+    client.get(news_detail_url)
+    with CaptureQueriesContext(connection) as queries:
+        client.get(news_detail_url, {'utm_source': 'mail'})
+    assert not queries
+
+
+def test_comment_controls_only_for_author(author_client, reader_client,
+                                          comment, news_detail_url,
+                                          news_edit_url, news_delete_url):
+    """
+    Тест проверяет, что ссылки редактирования и удаления
+    комментария видны только его автору.
+    """
+    for parametrized_client, expected in (
+        (author_client, True),
+        (reader_client, False),
+    ):
+        content = parametrized_client.get(news_detail_url).content.decode()
+        assert (news_edit_url in content) is expected
+        assert (news_delete_url in content) is expected
+        assert '<!--controls:' not in content
+
+
+def test_comment_thread_fragment_cached(reader_client, author_client,
+                                        comment, news_detail_url,
+                                        django_capture_on_commit_callbacks):
+    """
+    Тест проверяет, что авторизованный пользователь получает ветку
+    комментариев из кеша, а новый комментарий виден сразу.
+    """
+    reader_client.get(news_detail_url)
+    with CaptureQueriesContext(connection) as queries:
+        reader_client.get(news_detail_url)
+    assert not [query for query in queries
+                if 'news_comment' in query['sql']]
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(news_detail_url,
+                           data={'text': 'Свежий комментарий'})
+    assert ('Свежий комментарий'
+            in reader_client.get(news_detail_url).content.decode())
+
+
+@pytest.mark.parametrize('url', (
+    pytest.lazy_fixture('news_home_url'),
+    pytest.lazy_fixture('news_detail_url'),
+))
+def test_conditional_get(client, url, django_assert_max_num_queries):
+    """
+    Тест проверяет, что страница отвечает 304 на If-None-Match
+    и If-Modified-Since не более чем одним запросом к базе данных.
+    """
+    response = client.get(url)
+    for header, value in (
+        ('HTTP_IF_NONE_MATCH', response['ETag']),
+        ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+    ):
+        with django_assert_max_num_queries(1):
+            assert (client.get(url, **{header: value}).status_code
+                    == HTTPStatus.NOT_MODIFIED)
+
+
+def test_conditional_get_after_change(client, reader_client,
+                                      news_detail_url,
+                                      django_capture_on_commit_callbacks):
+    """
+    Тест проверяет, что ETag меняется после нового комментария
+    и различается для анонимного и авторизованного пользователей.
+    """
+    etag = client.get(news_detail_url)['ETag']
+    reader_response = reader_client.get(news_detail_url)
+    assert reader_response['ETag'] != etag
+    assert not reader_response.has_header('Last-Modified')
+    with django_capture_on_commit_callbacks(execute=True):
+        reader_client.post(news_detail_url, data={'text': 'Комментарий'})
+    assert (client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag).status_code
+            == HTTPStatus.OK)
+
+
+def test_conditional_get_after_relogin(reader, reader_client,
+                                       news_detail_url):
+    """
+    Тест проверяет, что после повторного входа страница с формой
+    не отдаётся 304 по старому ETag: в ней новый токен CSRF.
+    """
+    etag = reader_client.get(news_detail_url)['ETag']
+    reader_client.logout()
+    reader_client.force_login(reader)
+    assert (reader_client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+            .status_code == HTTPStatus.OK)
+
+
+@pytest.mark.parametrize('url', (
+    pytest.lazy_fixture('feed_rss_url'),
+    pytest.lazy_fixture('feed_atom_url'),
+))
+def test_news_feed(client, url, news_collection):
+    """
+    Тест проверяет, что лента содержит последние новости
+    в количестве, как на главной, начиная со свежей.
+    """
+    content = client.get(url).content.decode()
+    titles = [news.title for news in News.objects.all()]
+    assert sum(title in content for title in titles) == (
+        settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+    assert titles[0] in content
+
+
+@pytest.mark.parametrize('url', (
+    pytest.lazy_fixture('comments_feed_rss_url'),
+    pytest.lazy_fixture('comments_feed_atom_url'),
+))
+def test_comments_feed(client, url, comment):
+    """
+    Тест проверяет, что лента комментариев ведёт
+    к комментарию на странице новости.
+    """
+    content = client.get(url).content.decode()
+    assert comment.text in content
+    assert f'#comment-{comment.pk}' in content
+
+
+def test_comments_feed_links_to_comment_pages(client, comments_feed_rss_url,
+                                              comments_thread,
+                                              comments_page_size,
+                                              django_assert_num_queries):
+    """
+    Тест проверяет, что лента ведёт на страницы, которые начинаются
+    с комментария, и курсоры считаются без запроса на комментарий.
+    """
+    # Новость, ключи комментариев, комментарии.
+    with django_assert_num_queries(3):
+        content = client.get(comments_feed_rss_url).content.decode()
+    for comment in comments_thread[-comments_page_size:]:
+        url = escape(get_comment_page_url(
+            comment, anchor=f'comment-{comment.pk}'
+        ))
+        assert url in content
+
+
+@pytest.mark.parametrize('url, content_type', (
+    (pytest.lazy_fixture('feed_rss_url'), 'application/rss+xml'),
+    (pytest.lazy_fixture('feed_atom_url'), 'application/atom+xml'),
+    (pytest.lazy_fixture('comments_feed_rss_url'), 'application/rss+xml'),
+))
+def test_feed_served_from_cache(client, url, content_type,
+                                django_assert_num_queries):
+    """
+    Тест проверяет, что повторный запрос ленты отдаётся из кеша
+    без запросов к базе данных и с прежним типом содержимого.
+    """
+    content = client.get(url).content
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.content == content
+    assert response['Content-Type'].startswith(content_type)
+
+
+def test_feeds_invalidated_on_change(client, reader_client, news,
+                                     feed_rss_url, comments_feed_rss_url,
+                                     news_detail_url,
+                                     django_capture_on_commit_callbacks):
+    """
+    Тест проверяет, что изменения новости и новый комментарий
+    сразу видны в закешированных лентах.
+    """
+    client.get(feed_rss_url)
+    client.get(comments_feed_rss_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        reader_client.post(news_detail_url,
+                           data={'text': 'Свежий комментарий'})
+    assert ('Свежий комментарий'
+            in client.get(comments_feed_rss_url).content.decode())
+    news.title = 'Новый заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    assert 'Новый заголовок' in client.get(feed_rss_url).content.decode()
+
+
+@pytest.mark.parametrize('url', (
+    pytest.lazy_fixture('feed_rss_url'),
+    pytest.lazy_fixture('comments_feed_atom_url'),
+))
+def test_feed_conditional_get(client, url):
+    """Тест проверяет, что лента отвечает 304 на If-None-Match."""
+    etag = client.get(url)['ETag']
+    assert (client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+            == HTTPStatus.NOT_MODIFIED)
@@ -0,0 +1,20 @@
+import pytest
+from django.db import connection
+
+pytestmark = pytest.mark.django_db
+
+# Значения PRAGMA в том виде, в котором их возвращает SQLite.
+EXPECTED_PRAGMAS = {
+    'synchronous': 1,
+    'temp_store': 2,
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+}
+
+
+@pytest.mark.parametrize('name, expected', EXPECTED_PRAGMAS.items())
+def test_sqlite_pragmas_applied(name, expected):
+    """Тест проверяет, что профиль SQLite применён к соединению."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        assert cursor.fetchone()[0] == expected
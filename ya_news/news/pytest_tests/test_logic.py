@@ -1,13 +1,42 @@
+import gc
+import json
+import os
+import threading
+import time
+import tracemalloc
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from common.metrics import MetricsMiddleware, MetricsRegistry
+from common.profiling import ProfilingMiddleware, make_profiling_token
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import Client
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.ingest import NewsIngester, iter_fixture_objects
+from news.models import Comment, News, NewsTerm, SearchTerm
+from news.profanity import BadWordsMatcher
+from news.search import search_news, stem
 from pytest_django.asserts import assertFormError, assertRedirects
 
 pytestmark = pytest.mark.django_db
 
+CACHED_SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+CACHED_AUTH_BACKEND = 'common.backends.CachedModelBackend'
 FORM_DATA = {'text': 'Новый текст'}
+# Сессия, пользователь, новость, INSERT, счётчик, курсор страницы.
+CREATE_COMMENT_QUERIES = 6
+# Сессия, пользователь, комментарий, UPDATE, курсор страницы.
+EDIT_COMMENT_QUERIES = 5
+# Сессия, пользователь, комментарий, курсор страницы, DELETE, счётчик.
+DELETE_COMMENT_QUERIES = 6
+BENCH_REQUESTS = 40
+METRICS_OBSERVATIONS = 2000
+METRICS_THREADS = 20
+METRICS_TOKEN = 'metrics-token'
+METRICS_OVERHEAD_LIMIT = 50e-6
 BAD_WORDS_DATA = [{'text': word} for word in BAD_WORDS]
 
 
@@ -42,6 +71,21 @@ def test_user_can_create_comment(reader_client, news_detail_url,
     assert comment_from_db.author == reader
 
 
+def test_new_comment_redirects_to_its_page(
+    reader_client, news_detail_url, comments_thread, comments_page_size
+):
+    """
+    Тест проверяет, что после создания комментария в длинной ветке
+    пользователь попадает на страницу, где этот комментарий виден.
+    """
+    response = reader_client.post(news_detail_url, data=FORM_DATA)
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url.startswith(f'{news_detail_url}?after=')
+    assert response.url.endswith('#comments')
+    new_comment = Comment.objects.latest('created')
+    assert new_comment in reader_client.get(response.url).context['comments']
+
+
 @pytest.mark.parametrize('bad_words_data', BAD_WORDS_DATA)
 def test_user_cant_use_bad_words(reader_client, news_detail_url,
                                  bad_words_data):
@@ -55,6 +99,70 @@ def test_user_cant_use_bad_words(reader_client, news_detail_url,
     assert Comment.objects.count() == 0
 
 
+def test_user_cant_use_lookalike_letters(reader_client, news_detail_url):
+    """
+    Тест проверяет, что запрещённое слово не пройдёт,
+    если часть букв заменить похожими латинскими.
+    """
+    assertFormError(reader_client.post(news_detail_url,
+                                       data={'text': 'Ты PEДИCKA!'}),
+                    form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+def test_bad_words_reloaded_from_file(reader_client, news_detail_url,
+                                      settings, tmp_path):
+    """
+    Тест проверяет, что список запрещённых слов подгружается
+    из файла и перечитывается после его изменения.
+    """
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# Словарь модерации\nброкколи\n', 'utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    assertFormError(reader_client.post(news_detail_url,
+                                       data={'text': 'Ешь брокколи'}),
+                    form='form', field='text', errors=WARNING)
+    words_file.write_text('шпинат\n', 'utf-8')
+    stat = words_file.stat()
+    os.utime(words_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assertFormError(reader_client.post(news_detail_url,
+                                       data={'text': 'Ешь шпинат'}),
+                    form='form', field='text', errors=WARNING)
+    reader_client.post(news_detail_url, data={'text': 'Ешь брокколи'})
+    assert Comment.objects.count() == 1
+
+
+def test_bad_words_file_unavailable(reader_client, news_detail_url,
+                                    settings, tmp_path):
+    """
+    Тест проверяет, что после удаления файла слов остаётся прежний
+    список, а без файла работают слова по умолчанию.
+    """
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('брокколи\n', 'utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    reader_client.post(news_detail_url, data={'text': 'Ешь брокколи'})
+    words_file.unlink()
+    assertFormError(reader_client.post(news_detail_url,
+                                       data={'text': 'Ешь брокколи'}),
+                    form='form', field='text', errors=WARNING)
+    settings.BAD_WORDS_FILE = str(tmp_path / 'missing.txt')
+    assertFormError(reader_client.post(news_detail_url,
+                                       data={'text': BAD_WORDS[0]}),
+                    form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+def test_bad_words_matcher_finds_all_words():
+    """
+    Тест проверяет, что автомат находит все слова,
+    в том числе вложенные друг в друга.
+    """
+    matcher = BadWordsMatcher(('ус', 'усы', 'сын', 'сон'))
+    assert matcher.find_all('Усыновить') == {'ус', 'усы', 'сын'}
+    assert matcher.search('Текст') is None
+
+
 def test_author_can_edit_comment(author_client, comment,
                                  news_edit_url, redirect_to_comments):
     """
@@ -105,3 +213,483 @@ def test_other_user_cant_delete_note(reader_client, news_delete_url, comment):
     assert comment_from_db.text == comment.text
     assert comment_from_db.author == comment.author
     assert comment_from_db.news == comment.news
+
+
+def test_comment_count_follows_create_and_delete(
+    reader_client, author_client, news_detail_url, news_delete_url, news
+):
+    """
+    Тест проверяет, что счётчик комментариев новости
+    обновляется при создании и удалении комментария.
+    """
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    reader_client.post(news_detail_url, data=FORM_DATA)
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    author_client.post(news_delete_url)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_comment_count_follows_cascade_delete(comment, news, author):
+    """
+    Тест проверяет, что счётчик комментариев новости
+    уменьшается при каскадном удалении комментариев.
+    """
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_recount_comments_fixes_drift(comment, news):
+    """
+    Тест проверяет, что команда пересчёта
+    исправляет рассинхронизированный счётчик.
+    """
+    News.objects.update(comment_count=42)
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.parametrize('url, expected_queries', (
+    (pytest.lazy_fixture('news_detail_url'), CREATE_COMMENT_QUERIES),
+    (pytest.lazy_fixture('news_edit_url'), EDIT_COMMENT_QUERIES),
+    (pytest.lazy_fixture('news_delete_url'), DELETE_COMMENT_QUERIES),
+))
+def test_comment_write_queries(author_client, url, expected_queries,
+                               django_assert_num_queries):
+    """
+    Тест проверяет, что создание, редактирование и удаление
+    комментария выполняются фиксированным числом запросов.
+    """
+    with django_assert_num_queries(expected_queries):
+        assert (author_client.post(url, data=FORM_DATA).status_code
+                == HTTPStatus.FOUND)
+
+
+def make_fixture(news_count, comments_per_news=0, author_id=None):
+    """
+    JSON-фикстура с новостями и комментариями к ним.
+
+    Как в news/fixtures/news.json, pk новостям задаётся,
+    только если на них ссылаются комментарии.
+    """
+    objects = []
+    for index in range(news_count):
+        objects.append({'model': 'news.news', 'fields': {
+            'title': f'Новость {index}', 'text': 'Текст',
+            'date': '2022-11-01',
+        }})
+        if comments_per_news:
+            objects[-1]['pk'] = index
+        objects += [{'model': 'news.comment', 'fields': {
+            'news': index, 'author': author_id, 'text': 'Комментарий',
+        }}] * comments_per_news
+    return json.dumps(objects, ensure_ascii=False, indent=2)
+
+
+def test_iter_fixture_objects_across_chunks():
+    """
+    Тест проверяет, что объекты фикстуры разбираются одинаково
+    при любом размере читаемого куска.
+    """
+    fixture = make_fixture(5, 2, author_id=1)
+    for read_size in (1, 7, 1000):
+        assert list(iter_fixture_objects(
+            StringIO(fixture), read_size
+        )) == json.loads(fixture)
+
+
+def test_iter_fixture_objects_rejects_huge_object():
+    """
+    Тест проверяет, что объект длиннее предела прерывает разбор,
+    а не копится в памяти до конца файла.
+    """
+    fixture = json.dumps([{'text': 'x' * 1000}, {'text': 'y'}])
+    objects = iter_fixture_objects(StringIO(fixture), 10, 100)
+    with pytest.raises(ValueError):
+        list(objects)
+    assert len(list(iter_fixture_objects(StringIO(fixture), 10))) == 2
+
+
+def test_ingest_comment_created(news, author):
+    """
+    Тест проверяет, что комментарий из фикстуры сохраняет время
+    создания, а некорректное время отклоняет комментарий.
+    """
+    fixture = [{'model': 'news.news', 'pk': 1, 'fields': {
+        'title': 'С комментариями', 'text': 'Текст', 'date': '2022-11-01',
+    }}] + [{'model': 'news.comment', 'fields': {
+        'news': 1, 'author': author.pk, 'text': 'Комментарий',
+        'created': created,
+    }} for created in ('2022-11-02T10:00:00Z', '2022-11-03T10:00:00',
+                       'вчера')]
+    stats = NewsIngester().run(StringIO(json.dumps(fixture)))
+    assert stats['comments'] == 2
+    assert stats['rejected'] == 1
+    assert [
+        comment.created.isoformat() for comment in
+        Comment.objects.filter(news__title='С комментариями')
+    ] == ['2022-11-02T10:00:00+00:00', '2022-11-03T07:00:00+00:00']
+
+
+def test_ingest_news_dedupes_and_counts_comments(news, author):
+    """
+    Тест проверяет, что команда загрузки пропускает новости с теми же
+    заголовком и датой, привязывает комментарии к найденной новости
+    и обновляет счётчики комментариев.
+    """
+    fixture = json.loads(make_fixture(3, 2, author_id=author.pk))
+    fixture[0]['fields'].update(
+        title=news.title, date=f'{news.date:%Y-%m-%d}'
+    )
+    fixture += fixture[:1] + [
+        {'model': 'news.news', 'fields': {'title': 'Без текста'}},
+        {'model': 'news.comment', 'fields': {
+            'news': 100, 'author': author.pk, 'text': 'Текст',
+        }},
+    ]
+    news_count = News.objects.count()
+    ingester = NewsIngester(batch_size=2)
+    stats = ingester.run(StringIO(json.dumps(fixture)))
+    assert stats['news'] == 2
+    assert stats['duplicates'] == 2
+    assert stats['comments'] == 6
+    assert stats['rejected'] == 2
+    assert News.objects.count() == news_count + 2
+    news.refresh_from_db()
+    assert news.comment_count == news.comment_set.count() == 2
+    assert all(
+        item.comment_count == item.comment_set.count()
+        for item in News.objects.all()
+    )
+    assert len(search_news('новость')[0]) == 2
+    assert get_term_counts() == count_index_terms()
+
+
+def ingest_peak_memory(tmp_path, news_count):
+    path = tmp_path / f'news_{news_count}.json'
+    path.write_text(make_fixture(news_count), encoding='utf-8')
+    tracemalloc.start()
+    try:
+        call_command('ingest_news', str(path), batch_size=100,
+                     stdout=StringIO())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def test_ingest_news_memory_does_not_grow(tmp_path):
+    """
+    Тест проверяет, что расход памяти при загрузке
+    не зависит от размера файла.
+    """
+    small = ingest_peak_memory(tmp_path, 1000)
+    large = ingest_peak_memory(tmp_path, 4000)
+    assert News.objects.count() == 4000
+    assert large < small * 1.5
+
+
+@pytest.mark.parametrize('words', (
+    ('новость', 'новости', 'новостей', 'новостями'),
+    ('выборы', 'выборов', 'выборам'),
+    ('Ёлка', 'елки', 'ёлкой'),
+))
+def test_stem_merges_word_forms(words):
+    """Тест проверяет, что формы слова дают одну основу."""
+    assert len({stem(word) for word in words}) == 1
+
+
+def test_search_index_follows_news_changes(news):
+    """
+    Тест проверяет, что индекс обновляется при изменении
+    новости и очищается при её удалении.
+    """
+    assert search_news('заголовок')[0] == [news]
+    news.title = 'Переименованная'
+    news.save()
+    assert search_news('заголовок')[0] == []
+    assert search_news('переименованная')[0] == [news]
+    news.delete()
+    assert not NewsTerm.objects.exists()
+
+
+def get_term_counts():
+    """Хранимое число новостей по основам, без обнулённых."""
+    return dict(
+        SearchTerm.objects.filter(news_count__gt=0).values_list(
+            'term', 'news_count'
+        )
+    )
+
+
+def count_index_terms():
+    """Число новостей по основам, посчитанное по записям индекса."""
+    counts = {}
+    for term in NewsTerm.objects.values_list('term', flat=True):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def test_term_counts_follow_news_changes(news):
+    """
+    Тест проверяет, что число новостей по основам меняется
+    при создании, изменении и удалении новостей.
+    """
+    other = News.objects.create(title='Другой заголовок', text='Текст')
+    assert get_term_counts() == count_index_terms()
+    assert get_term_counts()[stem('заголовок')] == 2
+    other.title = 'Другое название'
+    other.save()
+    assert get_term_counts() == count_index_terms()
+    assert get_term_counts()[stem('заголовок')] == 1
+    news.delete()
+    assert get_term_counts() == count_index_terms()
+    assert stem('заголовок') not in get_term_counts()
+
+
+def test_rebuild_search_index(news):
+    """
+    Тест проверяет, что команда восстанавливает потерянный индекс
+    и число новостей по основам.
+    """
+    NewsTerm.objects.all().delete()
+    SearchTerm.objects.all().delete()
+    call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+    assert search_news('заголовок')[0] == [news]
+    assert get_term_counts() == count_index_terms()
+
+
+def test_news_excerpt_follows_text(news):
+    """
+    Тест проверяет, что начало текста пересчитывается при сохранении
+    новости, в том числе с update_fields.
+    """
+    assert news.excerpt == 'Текст'
+    news.text = ' '.join(f'слово{index}' for index in range(20))
+    news.save(update_fields=('text',))
+    news.refresh_from_db()
+    assert news.excerpt == ' '.join(
+        f'слово{index}' for index in range(15)
+    ) + ' …'
+
+
+def test_cached_session_ends_on_password_change(settings, author,
+                                                news_edit_url,
+                                                redirect_to_news_edit):
+    """
+    Тест проверяет, что пользователь из кеша не переживает
+    смену пароля: старая сессия перестаёт действовать.
+    """
+    settings.SESSION_ENGINE = CACHED_SESSION_ENGINE
+    settings.AUTHENTICATION_BACKENDS = [CACHED_AUTH_BACKEND]
+    author_client = Client()
+    author_client.force_login(author)
+    assert author_client.get(news_edit_url).status_code == HTTPStatus.OK
+    author.set_password('new-password')
+    author.save()
+    assertRedirects(author_client.get(news_edit_url), redirect_to_news_edit)
+
+
+@pytest.mark.parametrize('profiled_client, params, headers, profiled', (
+    (pytest.lazy_fixture('client'), {},
+     {'HTTP_X_PROFILE': make_profiling_token()}, True),
+    (pytest.lazy_fixture('client'), {},
+     {'HTTP_X_PROFILE': 'profile:подделка'}, False),
+    (pytest.lazy_fixture('client'), {'profile': ''}, {}, False),
+    (pytest.lazy_fixture('reader_client'), {'profile': ''}, {}, False),
+    (pytest.lazy_fixture('staff_client'), {'profile': ''}, {}, True),
+    (pytest.lazy_fixture('staff_client'), {}, {}, False),
+))
+def test_request_profiling(settings, tmp_path, news_detail_url,
+                           profiled_client, params, headers, profiled):
+    """
+    Тест проверяет, что запрос профилируется только по подписанному
+    заголовку или по параметру для персонала, а файлы профиля
+    помечены именем маршрута.
+    """
+    settings.PROFILING_DIR = str(tmp_path)
+    assert profiled_client.get(
+        news_detail_url, params, **headers
+    ).status_code == HTTPStatus.OK
+    files = sorted(path.suffix for path in tmp_path.iterdir())
+    assert files == (['.prof', '.txt'] if profiled else [])
+    if profiled:
+        assert all('news-detail' in path.name for path in tmp_path.iterdir())
+
+
+def test_profiling_token_use_limit(settings, tmp_path, client,
+                                   news_detail_url):
+    """
+    Тест проверяет, что токен профилирования действует ограниченное
+    число раз, а профили одного маршрута не затирают друг друга.
+    """
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_TOKEN_MAX_USES = 2
+    token = make_profiling_token()
+    for _ in range(settings.PROFILING_TOKEN_MAX_USES + 1):
+        client.get(news_detail_url, HTTP_X_PROFILE=token)
+    assert len(list(tmp_path.glob('*.prof'))) == 2
+    assert len(list(tmp_path.glob('*.txt'))) == 2
+    client.get(news_detail_url, HTTP_X_PROFILE=make_profiling_token())
+    assert len(list(tmp_path.glob('*.prof'))) == 3
+
+
+def test_profiling_middleware_not_used_without_dir(settings):
+    """Тест проверяет, что без каталога профилей слой не подключается."""
+    settings.PROFILING_DIR = None
+    with pytest.raises(MiddlewareNotUsed):
+        ProfilingMiddleware(lambda request: None)
+
+
+def test_metrics_by_route(settings, client, news_detail_url, metrics_url):
+    """
+    Тест проверяет, что после запроса страницы в метриках есть
+    время ответа, SQL, рендеринг и размер ответа по её маршруту.
+    """
+    settings.METRICS_TOKEN = METRICS_TOKEN
+    client.get(news_detail_url)
+    response = client.get(
+        metrics_url, HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}'
+    )
+    assert response['Content-Type'].startswith('text/plain')
+    content = response.content.decode()
+    for name in (
+        'http_request_duration_seconds', 'db_queries_per_request',
+        'db_query_duration_seconds', 'template_render_duration_seconds',
+        'http_response_size_bytes',
+    ):
+        assert f'# TYPE {name} histogram' in content
+        assert (f'{name}_count{{view="news:detail",method="GET"}}'
+                in content)
+    assert 'le="+Inf"' in content
+
+
+def test_metrics_unknown_method(settings, client, news_detail_url,
+                                metrics_url):
+    """
+    Тест проверяет, что нестандартный метод запроса попадает
+    в метрики как other, а не заводит новый ряд.
+    """
+    settings.METRICS_TOKEN = METRICS_TOKEN
+    client.generic('PROPFIND-X', news_detail_url)
+    content = client.get(
+        metrics_url, HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}'
+    ).content.decode()
+    assert ('http_request_duration_seconds_count'
+            '{view="news:detail",method="other"}' in content)
+    assert 'PROPFIND-X' not in content
+
+
+@pytest.mark.parametrize('token, authorization', (
+    (None, ''),
+    (None, 'Bearer '),
+    (METRICS_TOKEN, ''),
+    (METRICS_TOKEN, 'Bearer wrong'),
+))
+def test_metrics_require_token(settings, client, metrics_url, token,
+                               authorization):
+    """
+    Тест проверяет, что без верного токена метрики недоступны
+    и с локального адреса, с которого ходит обратный прокси.
+    """
+    settings.METRICS_TOKEN = token
+    assert client.get(
+        metrics_url, REMOTE_ADDR='127.0.0.1',
+        HTTP_AUTHORIZATION=authorization
+    ).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_metrics_registry_threads():
+    """
+    Тест проверяет, что наблюдения из разных потоков
+    складываются без потерь.
+    """
+    registry = MetricsRegistry()
+    labels = ('news:home', 'GET')
+
+    def observe():
+        for _ in range(METRICS_OBSERVATIONS):
+            registry.observe('db_queries_per_request', labels, 1)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    buckets, total = registry.collect()[('db_queries_per_request', labels)]
+    assert sum(buckets) == total == 4 * METRICS_OBSERVATIONS
+
+
+def test_metrics_registry_retires_thread_shards():
+    """
+    Тест проверяет, что шарды завершённых потоков сливаются
+    в общий и наблюдения не теряются.
+    """
+    registry = MetricsRegistry()
+    labels = ('news:home', 'GET')
+    for _ in range(METRICS_THREADS):
+        thread = threading.Thread(target=registry.observe, args=(
+            'db_queries_per_request', labels, 1
+        ))
+        thread.start()
+        thread.join()
+        del thread
+        gc.collect()
+    assert registry.shards == []
+    buckets, total = registry.collect()[('db_queries_per_request', labels)]
+    assert sum(buckets) == total == METRICS_THREADS
+
+
+def test_metrics_middleware_overhead(rf):
+    """
+    Тест проверяет, что запись метрик добавляет к запросу
+    меньше METRICS_OVERHEAD_LIMIT секунд.
+    """
+    def get_response(request):
+        return HttpResponse('ok')
+
+    def measure(handler):
+        request = rf.get('/')
+        start = time.perf_counter()
+        for _ in range(METRICS_OBSERVATIONS):
+            handler(request)
+        return (time.perf_counter() - start) / METRICS_OBSERVATIONS
+
+    bare = min(measure(get_response) for _ in range(3))
+    middleware = MetricsMiddleware(get_response)
+    instrumented = min(measure(middleware) for _ in range(3))
+    assert instrumented - bare < METRICS_OVERHEAD_LIMIT
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_routes_baseline(tmp_path):
+    """
+    Тест проверяет, что bench_routes прогоняет смесь через оба
+    транспорта, пишет базовый замер и падает при регрессии.
+    """
+    baseline = tmp_path / 'baseline.json'
+    call_command(
+        'bench_routes', requests=BENCH_REQUESTS, concurrency=2, comments=5,
+        output=str(baseline), stdout=StringIO()
+    )
+    results = json.loads(baseline.read_text(encoding='utf-8'))
+    assert set(results) == {'inprocess', 'http'}
+    for routes in results.values():
+        assert set(routes) == {
+            'news:home', 'news:detail', 'news:detail (POST)'
+        }
+        assert not any(stats['errors'] for stats in routes.values())
+    for routes in results.values():
+        for stats in routes.values():
+            stats['p95'], stats['rps'] = 0, float('inf')
+    baseline.write_text(json.dumps(results), encoding='utf-8')
+    with pytest.raises(CommandError):
+        call_command(
+            'bench_routes', requests=BENCH_REQUESTS, concurrency=2,
+            comments=5, baseline=str(baseline), stdout=StringIO()
+        )
+    assert not News.objects.exists()
@@ -0,0 +1,40 @@
+import pytest
+from django.core.cache import cache
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+COMMENT_SCALES = (10, 10_000)
+
+NEWS_HOME_URL = pytest.lazy_fixture('news_home_url')
+NEWS_DETAIL_URL = pytest.lazy_fixture('news_detail_url')
+NEWS_EDIT_URL = pytest.lazy_fixture('news_edit_url')
+NEWS_DELETE_URL = pytest.lazy_fixture('news_delete_url')
+
+CLIENT = pytest.lazy_fixture('client')
+AUTHOR_CLIENT = pytest.lazy_fixture('author_client')
+
+
+@pytest.mark.parametrize('route, url, parametrized_client', (
+    ('news:home', NEWS_HOME_URL, CLIENT),
+    ('news:detail', NEWS_DETAIL_URL, CLIENT),
+    ('news:edit', NEWS_EDIT_URL, AUTHOR_CLIENT),
+    ('news:delete', NEWS_DELETE_URL, AUTHOR_CLIENT),
+))
+def test_route_query_budget(route, url, parametrized_client, query_budget,
+                            comment, news, author):
+    """
+    Тест проверяет, что маршрут укладывается в бюджет запросов
+    и времени, а число запросов не растёт с числом комментариев.
+    Замеряется рендеринг страницы, кеш страниц сбрасывается.
+    """
+    for scale in COMMENT_SCALES:
+        Comment.objects.bulk_create(
+            Comment(news=news, author=author, text='Текст')
+            for _ in range(scale - Comment.objects.count())
+        )
+        cache.clear()
+        with query_budget.measure(route, scale):
+            parametrized_client.get(url)
+    errors = query_budget.get_errors(route)
+    assert not errors, '\n'.join(errors)
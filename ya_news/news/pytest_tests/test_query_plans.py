@@ -0,0 +1,71 @@
+import re
+
+import pytest
+from news.models import News
+from news.pagination import (encode_cursor, get_comments_page_queryset,
+                             get_previous_comments_queryset)
+from news.search import get_results_queryset
+from news.views import NewsList
+
+pytestmark = pytest.mark.django_db
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\w+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def assert_uses_indexes(queryset):
+    """Проверяет, что план запроса не содержит полного скана и сортировки."""
+    plan = queryset.explain()
+    for line in plan.splitlines():
+        assert not FULL_SCAN.search(line), plan
+        assert TEMP_SORT not in line, plan
+
+
+def test_news_list_plan(news_collection):
+    """Тест проверяет план запроса главной страницы."""
+    assert_uses_indexes(NewsList().get_queryset())
+
+
+def test_news_detail_plan(news):
+    """Тест проверяет план запроса новости на её странице."""
+    assert_uses_indexes(News.objects.filter(pk=news.pk))
+
+
+@pytest.mark.parametrize('with_cursor', (False, True))
+def test_comments_page_plan(comment, with_cursor):
+    """Тест проверяет план запроса страницы комментариев."""
+    cursor = with_cursor and encode_cursor(comment.created, comment.pk)
+    assert_uses_indexes(get_comments_page_queryset(comment.news_id, cursor))
+
+
+def test_comment_cursor_plan(comment):
+    """Тест проверяет план запроса курсора страницы комментария."""
+    assert_uses_indexes(get_previous_comments_queryset(comment))
+
+
+@pytest.mark.parametrize('with_cursor', (False, True))
+def test_single_term_search_plan(search_results, with_cursor):
+    """
+    Тест проверяет, что выдача по одному слову читается
+    из индекса без сортировки, а курсор ищется по индексу.
+    """
+    key = with_cursor and (3, search_results[2].date, search_results[2].pk)
+    queryset = get_results_queryset(['выбор'], 'выбор', key or None)[:10]
+    assert_uses_indexes(queryset)
+    if with_cursor:
+        # Курсор — поиск по индексу, а не перебор предыдущих записей.
+        assert '(weight,date,news_id)<' in queryset.explain()
+
+
+def test_several_terms_search_plan(search_results):
+    """
+    Тест проверяет, что выдача по нескольким словам идёт по записям
+    самого редкого слова без сортировки, а остальные слова
+    проверяются по id новости.
+    """
+    News.objects.create(title='Итоги', text='Текст')
+    queryset = get_results_queryset(['выбор', 'итог'], 'итог')[:10]
+    assert_uses_indexes(queryset)
+    plan = queryset.explain()
+    assert 'news_term_rank_idx (term=?)' in plan, plan
+    assert 'news_term_news_idx (news_id=? AND term=?)' in plan, plan
@@ -7,6 +7,15 @@ pytestmark = pytest.mark.django_db
 
 NEWS_HOME_URL = pytest.lazy_fixture('news_home_url')
 NEWS_DETAIL_URL = pytest.lazy_fixture('news_detail_url')
+NEWS_SEARCH_URL = pytest.lazy_fixture('news_search_url')
+METRICS_URL = pytest.lazy_fixture('metrics_url')
+FEED_RSS_URL = pytest.lazy_fixture('feed_rss_url')
+FEED_ATOM_URL = pytest.lazy_fixture('feed_atom_url')
+COMMENTS_FEED_RSS_URL = pytest.lazy_fixture('comments_feed_rss_url')
+COMMENTS_FEED_ATOM_URL = pytest.lazy_fixture('comments_feed_atom_url')
+API_NEWS_LIST_URL = pytest.lazy_fixture('api_news_list_url')
+API_NEWS_DETAIL_URL = pytest.lazy_fixture('api_news_detail_url')
+API_COMMENTS_URL = pytest.lazy_fixture('api_comments_url')
 USERS_LOGIN_URL = pytest.lazy_fixture('users_login_url')
 USERS_LOGOUT_URL = pytest.lazy_fixture('users_logout_url')
 USERS_SIGNUP_URL = pytest.lazy_fixture('users_signup_url')
@@ -23,6 +32,15 @@ READER_CLIENT = pytest.lazy_fixture('reader_client')
 @pytest.mark.parametrize('url, parametrized_client, expected_status', (
     (NEWS_HOME_URL, CLIENT, HTTPStatus.OK),
     (NEWS_DETAIL_URL, CLIENT, HTTPStatus.OK),
+    (NEWS_SEARCH_URL, CLIENT, HTTPStatus.OK),
+    (METRICS_URL, CLIENT, HTTPStatus.NOT_FOUND),
+    (FEED_RSS_URL, CLIENT, HTTPStatus.OK),
+    (FEED_ATOM_URL, CLIENT, HTTPStatus.OK),
+    (COMMENTS_FEED_RSS_URL, CLIENT, HTTPStatus.OK),
+    (COMMENTS_FEED_ATOM_URL, CLIENT, HTTPStatus.OK),
+    (API_NEWS_LIST_URL, CLIENT, HTTPStatus.OK),
+    (API_NEWS_DETAIL_URL, CLIENT, HTTPStatus.OK),
+    (API_COMMENTS_URL, CLIENT, HTTPStatus.OK),
     (USERS_LOGIN_URL, CLIENT, HTTPStatus.OK),
     (USERS_LOGOUT_URL, CLIENT, HTTPStatus.OK),
     (USERS_SIGNUP_URL, CLIENT, HTTPStatus.OK),
@@ -0,0 +1,281 @@
+import base64
+import re
+from collections import Counter
+from datetime import date
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import BooleanField, Count, Exists, F, OuterRef
+from django.db.models.expressions import RawSQL
+from django.http import Http404
+from django.urls import reverse
+
+from .models import NEWS_LIST_FIELDS, News, NewsTerm, SearchTerm
+from .pagination import CURSOR_PARAM, CURSOR_SEPARATOR
+
+WORD = re.compile(r'\w+')
+MIN_STEM_LENGTH = 3
+MAX_TERM_LENGTH = NewsTerm._meta.get_field('term').max_length
+MAX_QUERY_TERMS = 5
+UPDATE_BATCH_SIZE = 500
+# Записи после ключа курсора. Сравнение строк значений SQLite
+# выполняет поиском по индексу, а условие через OR — перебором
+# всех предыдущих записей слова.
+AFTER_KEY_SQL = '("weight", "date", "news_id") < (%s, %s, %s)'
+TITLE_WEIGHT = 3
+# Окончания, от длинных к коротким: отрезаем самое длинное подходящее.
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'иях', 'ях', 'ах', 'ией', 'ей', 'ой', 'ий', 'ый',
+    'ым', 'им', 'ом', 'ем', 'ам', 'ям', 'ов', 'ев', 'ыми', 'ими', 'ого',
+    'его', 'ому', 'ему', 'ых', 'их', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие',
+    'ую', 'юю', 'ия', 'ья', 'ье', 'ию', 'ью', 'ться', 'тся', 'ешь',
+    'ете', 'ить', 'ать', 'ять', 'еть', 'а', 'е', 'и', 'й', 'о', 'у',
+    'ы', 'ь', 'ю', 'я',
+), key=len, reverse=True)
+STOP_WORDS = frozenset((
+    'а', 'без', 'в', 'во', 'да', 'для', 'до', 'же', 'за', 'и', 'из', 'или',
+    'к', 'как', 'ко', 'ли', 'на', 'над', 'не', 'ни', 'но', 'о', 'об', 'от',
+    'по', 'под', 'при', 'про', 'с', 'со', 'то', 'у', 'что', 'это',
+))
+
+
+def stem(word):
+    """
+    Упрощённая основа русского слова.
+
+    Отрезаем одно окончание, если после этого остаётся не меньше
+    MIN_STEM_LENGTH букв, так что «новости», «новостей» и «новость»
+    дают одну основу.
+    """
+    word = word.lower().replace('ё', 'е')
+    for ending in ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)][:MAX_TERM_LENGTH]
+    return word[:MAX_TERM_LENGTH]
+
+
+def get_terms(text):
+    """Основы слов текста без стоп-слов."""
+    return [
+        stem(word) for word in WORD.findall(text)
+        if word.lower() not in STOP_WORDS
+    ]
+
+
+def get_news_terms(title, text):
+    """Вес каждой основы: вхождения в заголовок весят больше."""
+    weights = Counter(get_terms(text))
+    for term in get_terms(title):
+        weights[term] += TITLE_WEIGHT
+    return weights
+
+
+def make_terms(news_list):
+    """Записи индекса для новостей, у которых уже есть id."""
+    return [
+        NewsTerm(term=term, news_id=news.pk, weight=weight, date=news.date)
+        for news in news_list
+        for term, weight in get_news_terms(news.title, news.text).items()
+    ]
+
+
+def count_news_terms(news_ids):
+    """Число записей индекса по основам для новостей news_ids."""
+    return Counter(dict(
+        NewsTerm.objects.filter(news_id__in=news_ids).values_list(
+            'term'
+        ).annotate(Count('id')).order_by()
+    ))
+
+
+def change_term_counts(deltas):
+    """
+    Меняем число новостей у основ на {основа: изменение}.
+
+    Основы с одинаковым изменением обновляются одним запросом,
+    поэтому сохранение новости стоит не больше двух UPDATE.
+    """
+    new_terms = [term for term, delta in deltas.items() if delta > 0]
+    for start in range(0, len(new_terms), UPDATE_BATCH_SIZE):
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term)
+             for term in new_terms[start:start + UPDATE_BATCH_SIZE]],
+            ignore_conflicts=True,
+        )
+    by_delta = {}
+    for term, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(term)
+    for delta, terms in by_delta.items():
+        for start in range(0, len(terms), UPDATE_BATCH_SIZE):
+            SearchTerm.objects.filter(
+                term__in=terms[start:start + UPDATE_BATCH_SIZE]
+            ).update(news_count=F('news_count') + delta)
+
+
+def add_terms(news_list):
+    """Записи индекса и число новостей по основам для новых новостей."""
+    terms = make_terms(news_list)
+    NewsTerm.objects.bulk_create(terms)
+    change_term_counts(Counter(term.term for term in terms))
+
+
+def index_news(news_list):
+    """
+    Обновляем индекс для новостей.
+
+    Старые записи удаляются одним запросом, новые вставляются
+    одним bulk_create. Число новостей меняется только у основ,
+    которые появились или пропали.
+    """
+    news_ids = [news.pk for news in news_list]
+    deltas = Counter()
+    deltas.subtract(count_news_terms(news_ids))
+    NewsTerm.objects.filter(news_id__in=news_ids).delete()
+    terms = make_terms(news_list)
+    NewsTerm.objects.bulk_create(terms)
+    deltas.update(term.term for term in terms)
+    change_term_counts(deltas)
+
+
+def unindex_news(news_ids):
+    """Убираем новости из числа новостей по основам перед удалением."""
+    deltas = Counter()
+    deltas.subtract(count_news_terms(news_ids))
+    change_term_counts(deltas)
+
+
+def rebuild_term_counts():
+    """Пересчитываем число новостей по основам по всему индексу."""
+    SearchTerm.objects.all().delete()
+    SearchTerm.objects.bulk_create(
+        (
+            SearchTerm(term=term, news_count=news_count)
+            for term, news_count in NewsTerm.objects.values_list(
+                'term'
+            ).annotate(Count('id')).order_by().iterator()
+        ),
+        batch_size=UPDATE_BATCH_SIZE,
+    )
+
+
+def rebuild_index(batch_size):
+    """
+    Строим индекс заново по всем новостям.
+
+    Новости читаются пачками по ключу, поэтому память
+    не зависит от их числа. Возвращаем число новостей.
+    """
+    NewsTerm.objects.all().delete()
+    last_id = 0
+    total = 0
+    while True:
+        batch = list(
+            News.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk', 'title', 'text', 'date')[:batch_size]
+        )
+        if not batch:
+            rebuild_term_counts()
+            return total
+        NewsTerm.objects.bulk_create(make_terms(batch))
+        last_id = batch[-1].pk
+        total += len(batch)
+
+
+def encode_cursor(score, news_date, pk):
+    """Упаковываем ключ результата (вес, дата, id) в строку для URL."""
+    raw = CURSOR_SEPARATOR.join(
+        (str(score), news_date.isoformat(), str(pk))
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Распаковываем курсор, некорректный курсор даёт 404."""
+    try:
+        score, news_date, pk = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split(CURSOR_SEPARATOR)
+        return int(score), date.fromisoformat(news_date), int(pk)
+    except ValueError:
+        raise Http404('Некорректный курсор поиска.')
+
+
+def get_rarest_term(terms):
+    """
+    Слово с наименьшим числом новостей или None, если какого-то
+    слова нет ни в одной новости.
+    """
+    counts = dict(
+        SearchTerm.objects.filter(term__in=terms).values_list(
+            'term', 'news_count'
+        )
+    )
+    if any(counts.get(term, 0) <= 0 for term in terms):
+        return None
+    return min(terms, key=counts.get)
+
+
+def get_results_queryset(terms, rarest, key=None):
+    """
+    Ключи (вес, дата, id) новостей со всеми словами terms.
+
+    Выдача идёт в порядке записей самого редкого слова: по его весу,
+    затем по дате, начиная после ключа key. SQLite читает записи
+    слова по индексу в этом порядке, у каждой проверяет остальные
+    слова по индексу (news, term) и останавливается, набрав LIMIT
+    новостей. Так страница стоит одинаково на любой глубине: сложить
+    веса всех слов пришлось бы по всем их записям.
+    """
+    queryset = NewsTerm.objects.filter(term=rarest)
+    for term in terms:
+        if term != rarest:
+            queryset = queryset.filter(Exists(NewsTerm.objects.filter(
+                news_id=OuterRef('news_id'), term=term
+            )))
+    if key is not None:
+        weight, news_date, pk = key
+        queryset = queryset.filter(RawSQL(
+            AFTER_KEY_SQL, (weight, news_date.isoformat(), pk),
+            output_field=BooleanField()
+        ))
+    return queryset.order_by('-weight', '-date', '-news_id').values_list(
+        'weight', 'date', 'news_id'
+    )
+
+
+def search_news(query, cursor=None):
+    """
+    Страница найденных новостей и курсор следующей страницы.
+
+    Страница выбирается по ключу (вес, дата, id), поэтому её
+    стоимость не зависит от глубины.
+    """
+    terms = list(dict.fromkeys(get_terms(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return [], None
+    rarest = terms[0] if len(terms) == 1 else get_rarest_term(terms)
+    if rarest is None:
+        return [], None
+    size = settings.NEWS_COUNT_ON_SEARCH_PAGE
+    keys = list(get_results_queryset(
+        terms, rarest, decode_cursor(cursor) if cursor else None
+    )[:size + 1])
+    next_cursor = None
+    if len(keys) > size:
+        keys = keys[:size]
+        next_cursor = encode_cursor(*keys[-1])
+    news = News.objects.only(*NEWS_LIST_FIELDS).in_bulk(
+        [pk for _, _, pk in keys]
+    )
+    return [news[pk] for _, _, pk in keys if pk in news], next_cursor
+
+
+def get_search_url(query, cursor=None):
+    """Адрес страницы поиска, начиная с курсора."""
+    params = {'q': query}
+    if cursor:
+        params[CURSOR_PARAM] = cursor
+    return reverse('news:search') + '?' + urlencode(params)
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import (bump_comments_version, bump_home_version,
+                    bump_news_version, is_on_home_page)
+from .models import Comment, News
+from .search import index_news, unindex_news
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Увеличиваем счётчик комментариев новости при создании комментария."""
+    if created:
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """
+    Уменьшаем счётчик комментариев новости при удалении комментария.
+
+    Срабатывает и при каскадном удалении, и при удалении из админки.
+    """
+    News.objects.filter(
+        pk=instance.news_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    """Сбрасываем кеш главной и страницы изменённой новости."""
+    bump_home_version()
+    bump_news_version(instance.pk)
+
+
+@receiver(post_save, sender=News)
+def reindex_news(sender, instance, update_fields=None, **kwargs):
+    """
+    Обновляем записи поискового индекса новости.
+
+    При удалении новости записи удаляются каскадом.
+    """
+    if update_fields and not {'title', 'text', 'date'} & set(update_fields):
+        return
+    index_news([instance])
+
+
+@receiver(pre_delete, sender=News)
+def unindex_deleted_news(sender, instance, **kwargs):
+    """
+    Уменьшаем число новостей у основ удаляемой новости.
+
+    Сами записи индекса удаляются каскадом.
+    """
+    unindex_news([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """
+    Сбрасываем кеш ветки комментариев и страницы новости
+    с изменённым комментарием.
+
+    Главную сбрасываем, только если на ней выведен счётчик этой новости.
+    """
+    bump_comments_version(instance.news_id)
+    bump_news_version(instance.news_id)
+    if is_on_home_page(instance.news_id):
+        bump_home_version()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_comments(sender, instance, created,
+                               update_fields=None, **kwargs):
+    """
+    Сбрасываем кеш веток, в которых выведено имя изменённого пользователя.
+
+    Сохранения, не затрагивающие имя (например, время входа), пропускаем.
+    """
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    news_ids = Comment.objects.filter(
+        author=instance
+    ).values_list('news_id', flat=True).distinct()
+    for news_id in news_ids:
+        bump_comments_version(news_id)
+        bump_news_version(news_id)
@@ -1,15 +1,41 @@
+from common import metrics
 from django.urls import path
-from news import views
+from news import api, feeds, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('metrics/', metrics.metrics_view, name='metrics'),
+    path('feeds/rss/', feeds.latest_news_rss, name='feed_rss'),
+    path('feeds/atom/', feeds.latest_news_atom, name='feed_atom'),
+    path(
+        'news/<int:pk>/comments/rss/',
+        feeds.news_comments_rss,
+        name='comments_feed_rss'
+    ),
+    path(
+        'news/<int:pk>/comments/atom/',
+        feeds.news_comments_atom,
+        name='comments_feed_atom'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.NewsListApi.as_view(), name='api_news_list'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api_news_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.CommentsApi.as_view(),
+        name='api_comments'
+    ),
 ]
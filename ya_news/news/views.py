@@ -1,13 +1,23 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404
-from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
 
+from .cache import (cache_anonymous_page, conditional_page,
+                    get_home_version_key, get_news_version_key,
+                    remember_home_news)
 from .forms import CommentForm
-from .models import Comment, News
+from .fragments import add_comment_controls, get_comments_fragment
+from .models import NEWS_LIST_FIELDS, Comment, News
+from .pagination import CURSOR_PARAM, get_comment_page_url
+from .search import get_search_url, search_news
 
 
+@method_decorator((
+    conditional_page(get_home_version_key),
+    cache_anonymous_page(get_home_version_key),
+), name='get')
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
@@ -18,22 +28,64 @@ class NewsList(generic.ListView):
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев и начало текста хранятся в самой новости,
+        поэтому полный текст не читается.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
+        return self.model.objects.only(
+            *NEWS_LIST_FIELDS
         )[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        remember_home_news(news.pk for news in context['object_list'])
+        return context
+
 
-class NewsDetail(generic.DetailView):
+class NewsSearch(generic.TemplateView):
+    """Поиск новостей по заголовку и тексту."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'], next_cursor = search_news(
+            query, self.request.GET.get(CURSOR_PARAM)
+        )
+        if next_cursor:
+            context['next_url'] = get_search_url(query, next_cursor)
+        return context
+
+
+class CommentsPageMixin:
+    """
+    Добавляет в контекст страницу комментариев новости.
+
+    Страница берётся готовым фрагментом из кеша, ссылки управления
+    своими комментариями добавляются для каждого пользователя отдельно.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        html, context['next_cursor'] = get_comments_fragment(
+            self.object.pk, self.request.GET.get(CURSOR_PARAM)
+        )
+        context['comments_html'] = add_comment_controls(
+            html, self.request.user
+        )
+        return context
+
+
+@method_decorator((
+    conditional_page(get_news_version_key),
+    cache_anonymous_page(get_news_version_key, (CURSOR_PARAM,)),
+), name='get')
+class NewsDetail(CommentsPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +96,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -51,6 +104,10 @@ class NewsComment(
     form_class = CommentForm
     template_name = 'news/detail.html'
 
+    def get_queryset(self):
+        """Для сохранения комментария достаточно id новости."""
+        return self.model.objects.only('pk')
+
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
@@ -60,11 +117,16 @@ class NewsComment(
         comment.news = self.object
         comment.author = self.request.user
         comment.save()
+        self.comment = comment
         return super().form_valid(form)
 
+    def form_invalid(self, form):
+        """Для вывода ошибок на странице новости нужна новость целиком."""
+        self.object = super().get_queryset().get(pk=self.object.pk)
+        return super().form_invalid(form)
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return get_comment_page_url(self.comment)
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +145,18 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
-        return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
-        ) + '#comments'
+        return get_comment_page_url(self.object)
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Заголовок новости для страницы формы выбирается тем же запросом.
+        """
+        queryset = self.model.objects.filter(author=self.request.user)
+        if self.request.method == 'GET':
+            return queryset.select_related('news')
+        return queryset
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +168,10 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def get_queryset(self):
+        """Для удаления достаточно ключа комментария и id новости."""
+        queryset = super().get_queryset()
+        if self.request.method == 'POST':
+            return queryset.only('pk', 'news_id', 'created')
+        return queryset
@@ -0,0 +1,64 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+NOTES_VERSION_KEY = 'notes:version:{user_id}'
+
+
+def get_notes_version(user_id):
+    """
+    Версия заметок пользователя.
+
+    Версия — время последнего изменения в наносекундах,
+    если её нет в кеше, заводим новую.
+    """
+    key = NOTES_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_notes_version(user_id):
+    cache.set(NOTES_VERSION_KEY.format(user_id=user_id), time.time_ns(), None)
+
+
+def get_notes_etag(request, **kwargs):
+    """
+    Значение ETag: версия заметок, пользователь, сессия и токен CSRF.
+
+    Ключ сессии и токен меняются при входе, поэтому после повторного
+    входа страница с формой не отдаётся из кеша браузера со старым
+    токеном.
+    """
+    user = request.user
+    return hashlib.md5(':'.join((
+        str(get_notes_version(user.pk)), str(user.pk), user.username,
+        request.session.session_key or '',
+        request.META.get('CSRF_COOKIE', ''),
+    )).encode()).hexdigest()
+
+
+def get_notes_last_modified(request, **kwargs):
+    """
+    Время последнего изменения заметок пользователя.
+
+    Не раньше его последнего входа: иначе после смены пользователя
+    в том же браузере If-Modified-Since вернул бы 304 на чужую копию.
+    """
+    user = request.user
+    last_modified = datetime.fromtimestamp(
+        get_notes_version(user.pk) / 10 ** 9, tz=timezone.utc
+    )
+    if user.last_login:
+        return max(last_modified, user.last_login)
+    return last_modified
+
+
+conditional_notes_page = condition(
+    etag_func=get_notes_etag, last_modified_func=get_notes_last_modified
+)
@@ -0,0 +1,74 @@
+import json
+import zipfile
+
+from .models import Note
+
+EXPORT_CHUNK_SIZE = 500
+FORMATS = ('ndjson', 'zip')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'zip': 'application/zip',
+}
+FIELDS = ('title', 'text', 'slug')
+
+
+def get_export_rows(author, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Заметки автора словарями, по chunk_size строк за раз.
+
+    values() не создаёт моделей, а iterator() не кеширует
+    результат, поэтому память не зависит от числа заметок.
+    """
+    return Note.objects.filter(author=author).order_by('pk').values(
+        *FIELDS
+    ).iterator(chunk_size=chunk_size)
+
+
+def iter_ndjson(rows):
+    """Строки NDJSON в формате, который принимает импорт."""
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False) + '\n').encode()
+
+
+class ZipStream:
+    """
+    Файл только для записи, из которого забирают записанное.
+
+    У него нет seek и tell, поэтому zipfile пишет архив
+    последовательно и не возвращается к уже отданным байтам.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_markdown_zip(rows):
+    """Zip-архив с заметкой в Markdown на файл, по частям."""
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for row in rows:
+            archive.writestr(
+                f'{row["slug"]}.md', f'# {row["title"]}\n\n{row["text"]}\n'
+            )
+            yield stream.pop()
+    yield stream.pop()
+
+
+def export_notes(author, file_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Байты выгрузки заметок автора в выбранном формате."""
+    rows = get_export_rows(author, chunk_size)
+    if file_format == 'zip':
+        return iter_markdown_zip(rows)
+    return iter_ndjson(rows)
@@ -1,6 +1,5 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from pytils.translit import slugify
 
 from .models import Note
 
@@ -14,15 +13,26 @@ class NoteForm(forms.ModelForm):
         model = Note
         fields = ('title', 'text', 'slug')
 
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+    def validate_unique(self):
+        """
+        Уникальность slug проверяет база данных при сохранении.
+
+        Пустой slug подбирается в Note.save, а совпадение указанного
+        пользователем slug обрабатывается в представлении.
+        """
+        exclude = self._get_validation_exclusions()
+        exclude.append('slug')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self._update_errors(error)
+
+
+class NoteImportForm(forms.Form):
+    """Форма загрузки файла с заметками."""
+    file = forms.FileField(label='Файл')
+    format = forms.ChoiceField(
+        label='Формат', required=False,
+        choices=(('', 'По расширению файла'),
+                 ('ndjson', 'NDJSON'), ('csv', 'CSV')),
+    )
@@ -0,0 +1,208 @@
+import csv
+import json
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .cache import bump_notes_version
+from .forms import WARNING, NoteForm
+from .models import MAX_SLUG_SUFFIX_LENGTH, Note, allocate_slug
+
+DEFAULT_BATCH_SIZE = 500
+FORMATS = ('ndjson', 'csv')
+UNREADABLE_CSV = 'остаток файла не прочитан: '
+
+
+def get_format(filename):
+    """Формат файла по расширению, по умолчанию NDJSON."""
+    return 'csv' if filename.lower().endswith('.csv') else 'ndjson'
+
+
+def read_csv_rows(stream):
+    """
+    Строки CSV, BOM в начале файла пропускается.
+
+    Строки файла декодируются по одной, чтобы знать номер строки
+    с ошибкой. Строка CSV может занимать несколько строк файла,
+    поэтому после ошибки кодировки или разбора дальше файл
+    не читается, а ошибка выдаётся как отклонённая строка.
+    """
+    reader = csv.DictReader(
+        line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        for number, line in enumerate(stream, 1)
+    )
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (UnicodeDecodeError, csv.Error) as error:
+            reason = (
+                'не в кодировке UTF-8'
+                if isinstance(error, UnicodeDecodeError) else str(error)
+            )
+            # Строка с ошибкой в line_num ещё не учтена.
+            yield reader.line_num + 1, UNREADABLE_CSV + reason
+            return
+        yield reader.line_num, row
+
+
+def read_ndjson_rows(stream):
+    """Строки NDJSON, каждая декодируется и разбирается отдельно."""
+    for number, line in enumerate(stream, 1):
+        try:
+            line = line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            yield number, 'строка не в кодировке UTF-8'
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, 'некорректный JSON'
+            continue
+        if not isinstance(row, dict):
+            yield number, 'ожидается JSON-объект'
+            continue
+        yield number, row
+
+
+def read_rows(stream, file_format):
+    """
+    Построчно читаем файл и выдаём пары (номер строки, данные).
+
+    Вместо данных выдаётся строка с ошибкой, если строку
+    не удалось разобрать.
+    """
+    if file_format == 'csv':
+        return read_csv_rows(stream)
+    return read_ndjson_rows(stream)
+
+
+def format_errors(form):
+    return '; '.join(
+        f'{field}: {" ".join(errors)}' for field, errors in form.errors.items()
+    )
+
+
+class NoteImporter:
+    """
+    Потоковый импорт заметок пользователя.
+
+    Строки проверяются правилами NoteForm и сохраняются через bulk_create
+    пачками фиксированного размера, каждая пачка в своей транзакции,
+    поэтому расход памяти не зависит от размера файла. Отклонённые строки
+    передаются в on_reject(номер строки, причина).
+    """
+
+    def __init__(self, author, batch_size=DEFAULT_BATCH_SIZE,
+                 on_reject=None):
+        self.author = author
+        self.batch_size = batch_size
+        self.on_reject = on_reject or (lambda number, reason: None)
+        self.max_slug_length = Note._meta.get_field('slug').max_length
+        self.inserted = 0
+        self.rejected = 0
+
+    def run(self, stream, file_format):
+        batch = []
+        for number, row in read_rows(stream, file_format):
+            if isinstance(row, str):
+                self.reject(number, row)
+                continue
+            form = NoteForm(data=row)
+            if not form.is_valid():
+                self.reject(number, format_errors(form))
+                continue
+            note = form.save(commit=False)
+            note.author = self.author
+            batch.append((number, note))
+            if len(batch) >= self.batch_size:
+                self.save_batch(batch)
+                batch = []
+        if batch:
+            self.save_batch(batch)
+        return self.inserted, self.rejected
+
+    def reject(self, number, reason):
+        self.rejected += 1
+        self.on_reject(number, reason)
+
+    def get_taken_slugs(self, bases, explicit):
+        """
+        Занятые slug для пачки.
+
+        Точные совпадения выбираются одним запросом, варианты
+        с суффиксом — вторым, и только для основ, которые уже заняты
+        или повторяются в пачке.
+        """
+        counts = Counter(bases)
+        taken = set(Note.objects.filter(
+            slug__in=set(counts) | explicit
+        ).values_list('slug', flat=True))
+        prefixes = Q()
+        for base, count in counts.items():
+            if count == 1 and base not in taken:
+                continue
+            prefixes |= Q(slug__startswith=base[
+                :self.max_slug_length - MAX_SLUG_SUFFIX_LENGTH
+            ])
+        if prefixes:
+            taken |= set(Note.objects.filter(
+                prefixes
+            ).values_list('slug', flat=True))
+        return taken
+
+    def allocate_slugs(self, batch):
+        """
+        Подбираем slug пачке.
+
+        Возвращаем строки, которые можно вставить, с признаком
+        подобранного автоматически slug.
+        """
+        bases = {
+            number: Note.make_slug_base(note.title)
+            for number, note in batch if not note.slug
+        }
+        taken = self.get_taken_slugs(
+            bases.values(), {note.slug for _, note in batch if note.slug}
+        )
+        accepted = []
+        for number, note in batch:
+            auto_slug = number in bases
+            if auto_slug:
+                note.slug = allocate_slug(
+                    bases[number], taken, self.max_slug_length
+                )
+            elif note.slug in taken:
+                self.reject(number, note.slug + WARNING)
+                continue
+            taken.add(note.slug)
+            accepted.append((number, note, auto_slug))
+        return accepted
+
+    def save_batch(self, batch):
+        batch = self.allocate_slugs(batch)
+        try:
+            with transaction.atomic():
+                Note.objects.bulk_create(note for _, note, _ in batch)
+            self.inserted += len(batch)
+        except IntegrityError:
+            # Slug успел занять параллельный запрос: сохраняем пачку
+            # по одной заметке, подбирая автоматические slug заново.
+            self.save_one_by_one(batch)
+        bump_notes_version(self.author.pk)
+
+    def save_one_by_one(self, batch):
+        for number, note, auto_slug in batch:
+            note.pk = None
+            if auto_slug:
+                note.slug = ''
+            try:
+                with transaction.atomic():
+                    note.save()
+                self.inserted += 1
+            except IntegrityError:
+                self.reject(number, note.slug + WARNING)
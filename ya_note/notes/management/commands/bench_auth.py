@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from notes.models import Note, User
+
+BENCH_USERNAME = 'bench-auth'
+SERVER_NAME = 'localhost'
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+CACHED_BACKEND = 'common.backends.CachedModelBackend'
+# Название, движок сессий и бэкенд аутентификации.
+MODES = (
+    ('Без кеша', 'django.contrib.sessions.backends.db', MODEL_BACKEND),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db',
+     CACHED_BACKEND),
+    ('signed_cookies', 'django.contrib.sessions.backends.signed_cookies',
+     CACHED_BACKEND),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число запросов в секунду к списку заметок '
+        'с кешем сессий и пользователей и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--notes', type=int, default=10,
+            help='Число заметок пользователя.'
+        )
+
+    def handle(self, *args, requests, notes, **options):
+        user = User.objects.create(username=BENCH_USERNAME)
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'bench-auth-{index}', author=user)
+            for index in range(notes)
+        )
+        url = reverse('notes:list')
+        try:
+            for title, engine, backend in MODES:
+                with override_settings(
+                    SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend]
+                ):
+                    client = Client(SERVER_NAME=SERVER_NAME)
+                    client.force_login(user, backend=backend)
+                    client.get(url)
+                    queries = self.count_queries(client, url)
+                    rate = self.measure(client, url, requests)
+                self.stdout.write(
+                    f'{title}: {rate:.0f} запросов/с, '
+                    f'запросов к БД на страницу: {queries}'
+                )
+        finally:
+            user.delete()
+
+    def count_queries(self, client, url):
+        """
+        Число SQL-запросов одной страницы.
+
+        Считаем через execute_wrapper: журнал запросов соединения
+        очищается в начале каждого запроса.
+        """
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            client.get(url)
+        return count
+
+    def measure(self, client, url, requests):
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get(url)
+        return requests / (time.perf_counter() - start)
@@ -0,0 +1,65 @@
+import itertools
+from contextlib import contextmanager
+
+from django.urls import reverse
+
+from common.benchmark import BenchRoutesCommand, Step, get_session_cookie
+from notes.models import Note, User
+
+BENCH_USERNAME = 'bench-routes'
+BENCH_SLUG = 'bench-routes'
+# Доли маршрутов в смеси: список читают чаще, чем пишут заметки.
+LIST_WEIGHT = 6
+ADD_WEIGHT = 2
+EDIT_WEIGHT = 2
+
+
+class Command(BenchRoutesCommand):
+    help = (
+        'Нагрузочный прогон смеси запросов к маршрутам заметок: '
+        'задержки p50/p95/p99 и запросы в секунду.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--notes', type=int, default=50,
+            help='Число заметок пользователя до начала прогона.'
+        )
+
+    @contextmanager
+    def prepare_mix(self, notes, **options):
+        user = User.objects.create(username=BENCH_USERNAME)
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'{BENCH_SLUG}-{index}', author=user)
+            for index in range(notes)
+        )
+        note = Note.objects.create(
+            title='Нагрузочный тест', text='Текст', slug=BENCH_SLUG,
+            author=user
+        )
+        try:
+            yield self.get_mix(note, user)
+        finally:
+            user.delete()
+
+    def get_mix(self, note, user):
+        session = get_session_cookie(user)
+        numbers = itertools.count()
+        return (
+            (Step('notes:list', 'GET', reverse('notes:list'), None, session),
+             LIST_WEIGHT),
+            (Step('notes:add', 'POST', reverse('notes:add'),
+                  lambda: {'title': f'Новая заметка {next(numbers)}',
+                           'text': 'Текст'},
+                  session),
+             ADD_WEIGHT),
+            (Step('notes:edit', 'POST',
+                  reverse('notes:edit', args=(note.slug,)),
+                  lambda: {'title': note.title,
+                           'text': f'Текст {next(numbers)}',
+                           'slug': note.slug},
+                  session),
+             EDIT_WEIGHT),
+        )
@@ -0,0 +1,84 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note, User
+from notes.search import search_notes
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+BENCH_USERNAME = 'bench-search-{}'
+BATCH_SIZE = 10_000
+
+
+def random_word(rng, min_length=4, max_length=9):
+    return ''.join(
+        rng.choice(ALPHABET)
+        for _ in range(rng.randint(min_length, max_length))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полнотекстовый поиск FTS5 с фильтром icontains '
+        'на большом числе заметок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Число авторов, между которыми делятся заметки.'
+        )
+        parser.add_argument(
+            '--words', type=int, default=50,
+            help='Число слов в тексте заметки.'
+        )
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, notes, users, words, queries, seed,
+               **options):
+        rng = random.Random(seed)
+        vocabulary = [random_word(rng) for _ in range(10_000)]
+        authors = [
+            User.objects.create(username=BENCH_USERNAME.format(index))
+            for index in range(users)
+        ]
+        try:
+            start = time.perf_counter()
+            for offset in range(0, notes, BATCH_SIZE):
+                with transaction.atomic():
+                    Note.objects.bulk_create(
+                        Note(
+                            title=' '.join(rng.choices(vocabulary, k=3)),
+                            text=' '.join(rng.choices(vocabulary, k=words)),
+                            slug=f'bench-search-{index}',
+                            author=authors[index % users],
+                        )
+                        for index in range(
+                            offset, min(offset + BATCH_SIZE, notes)
+                        )
+                    )
+            self.stdout.write(
+                f'Заметок: {notes}, вставка с индексом: '
+                f'{time.perf_counter() - start:.1f} с'
+            )
+            terms = rng.choices(vocabulary, k=queries)
+            for title, search in (
+                ('icontains', lambda author, term: list(
+                    Note.objects.filter(author=author, text__icontains=term)
+                    .values_list('slug', flat=True)
+                )),
+                ('FTS5', lambda author, term: search_notes(author.pk, term)),
+            ):
+                start = time.perf_counter()
+                for term in terms:
+                    search(rng.choice(authors), term)
+                elapsed = (time.perf_counter() - start) / queries
+                self.stdout.write(f'{title}: {elapsed * 1000:.1f} мс')
+        finally:
+            User.objects.filter(
+                pk__in=[author.pk for author in authors]
+            ).delete()
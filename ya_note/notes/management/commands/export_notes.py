@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.exporting import EXPORT_CHUNK_SIZE, FORMATS, export_notes
+from notes.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки пользователя в NDJSON или zip с Markdown.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, default=FORMATS[0])
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help='Количество заметок, читаемых из базы данных за раз.'
+        )
+
+    def handle(self, *args, username, path, format, chunk_size, **options):
+        try:
+            author = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        size = 0
+        with open(path, 'wb') as export_file:
+            for chunk in export_notes(author, format, chunk_size):
+                export_file.write(chunk)
+                size += len(chunk)
+        self.stdout.write(f'Записано байт: {size}.')
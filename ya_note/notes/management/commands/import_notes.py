@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.importing import (DEFAULT_BATCH_SIZE, FORMATS, NoteImporter,
+                             get_format)
+from notes.models import User
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки пользователя из файла NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, *args, username, path, format, batch_size, **options):
+        try:
+            author = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        importer = NoteImporter(
+            author, batch_size,
+            on_reject=lambda number, reason: self.stderr.write(
+                f'Строка {number}: {reason}'
+            )
+        )
+        with open(path, 'rb') as stream:
+            inserted, rejected = importer.run(
+                stream, format or get_format(path)
+            )
+        self.stdout.write(
+            f'Добавлено заметок: {inserted}, отклонено строк: {rejected}.'
+        )
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# Внешнее содержимое: индекс не хранит копию текста, а читает его
+# из notes_note по rowid. Колонка author_id ограничивает поиск
+# заметками автора прямо в индексе.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        author_id, title, text,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        ) VALUES ('delete', old.id, old.author_id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE OF author_id, title, text ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        ) VALUES ('delete', old.id, old.author_id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+DROP_SQL = (
+    'DROP TRIGGER notes_note_fts_update',
+    'DROP TRIGGER notes_note_fts_delete',
+    'DROP TRIGGER notes_note_fts_insert',
+    'DROP TABLE notes_note_fts',
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
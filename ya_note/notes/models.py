@@ -1,10 +1,29 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
 from pytils.translit import slugify
 
 User = get_user_model()
 
+DEFAULT_SLUG = 'note'
+# Запас длины под числовой суффикс вида -123.
+MAX_SLUG_SUFFIX_LENGTH = 8
+SLUG_ATTEMPTS = 5
+
+
+def allocate_slug(base, taken, max_length):
+    """Первый свободный slug вида base, base-2, base-3 и так далее."""
+    if base not in taken:
+        return base
+    number = 2
+    while True:
+        suffix = f'-{number}'
+        candidate = base[:max_length - len(suffix)] + suffix
+        if candidate not in taken:
+            return candidate
+        number += 1
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -30,11 +49,56 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def make_slug_base(cls, title):
+        """Slug по заголовку, из которого подбирается свободный."""
+        max_length = cls._meta.get_field('slug').max_length
+        return slugify(title)[:max_length] or DEFAULT_SLUG
+
+    @classmethod
+    def get_taken_slugs(cls, base, exclude_pk=None):
+        """Занятые slug, которые могут совпасть с base или base-N."""
+        max_length = cls._meta.get_field('slug').max_length
+        prefix = base[:max_length - MAX_SLUG_SUFFIX_LENGTH]
+        if prefix == base:
+            # Только сам base и base-N, без slug с тем же началом.
+            condition = Q(slug=base) | Q(slug__startswith=f'{base}-')
+        else:
+            # Длинный base укорачивается под суффикс, сравниваем по началу.
+            condition = Q(slug__startswith=prefix)
+        return set(
+            cls.objects.filter(condition)
+            .exclude(pk=exclude_pk)
+            .values_list('slug', flat=True)
+        )
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Если slug не указан, подбираем свободный по заголовку.
+
+        Занятые варианты выбираются одним запросом по префиксу. Если между
+        выбором и сохранением slug занял другой запрос, база данных
+        отклонит запись, и мы подберём slug заново.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_length = self._meta.get_field('slug').max_length
+        base = self.make_slug_base(self.title)
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(
+                base, self.get_taken_slugs(base, self.pk), max_length
+            )
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
@@ -0,0 +1,84 @@
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'notes_note_fts'
+SEARCH_RESULTS_LIMIT = 50
+SNIPPET_TOKENS = 16
+# Вес совпадений в заголовке и в тексте для bm25, author_id не ранжируем.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+# Границы совпадения в сниппете: символы, которых нет в обычном тексте.
+# Сниппет экранируется целиком, и только потом они заменяются на <mark>.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+TERM = re.compile(r'\w+')
+
+SearchResult = namedtuple('SearchResult', ('slug', 'title', 'snippet'))
+
+SEARCH_SQL = f"""
+    SELECT note.slug, note.title,
+           snippet({FTS_TABLE}, 2, %s, %s, '…', %s)
+    FROM {FTS_TABLE}
+    JOIN notes_note AS note ON note.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY bm25({FTS_TABLE}, 0, %s, %s)
+    LIMIT %s
+"""
+
+
+def build_match(author_id, query):
+    """
+    Выражение MATCH для запроса пользователя.
+
+    Каждое слово ищется как префикс, чтобы находились другие формы
+    слова; операторы FTS5 из запроса не передаются.
+    """
+    terms = TERM.findall(query.lower())
+    if not terms:
+        return None
+    phrase = ' '.join(f'"{term}"*' for term in terms)
+    return f'author_id : "{author_id}" AND {{title text}} : ({phrase})'
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+def search_notes(author_id, query, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Заметки автора, подходящие под запрос, от наиболее релевантных.
+
+    Поиск идёт по индексу FTS5, который триггеры базы данных держат
+    в согласии с notes_note при любом способе записи.
+    """
+    match = build_match(author_id, query)
+    if match is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, (
+            MATCH_START, MATCH_END, SNIPPET_TOKENS, match,
+            TITLE_WEIGHT, TEXT_WEIGHT, limit,
+        ))
+        return [
+            SearchResult(slug, title, highlight(snippet))
+            for slug, title, snippet in cursor.fetchall()
+        ]
+
+
+def rebuild_index():
+    """Перестраиваем индекс по содержимому notes_note."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_notes_version
+from .models import Note
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_notes_pages(sender, instance, **kwargs):
+    """Меняем версию заметок автора, чтобы сбросить ETag его страниц."""
+    bump_notes_version(instance.author_id)
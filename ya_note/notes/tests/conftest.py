@@ -1,9 +1,29 @@
+from common.query_budget import Budget, QueryBudget
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 from notes.models import Note, User
 
 NOTE_SLUG = 'note_slug'
 
+QUERY_BUDGET = QueryBudget({
+    'notes:home': Budget(queries=2, milliseconds=300),
+    'notes:add': Budget(queries=2, milliseconds=300),
+    # Список без пагинации растёт с числом заметок: около 1000 мс
+    # на 10 000 заметок. Время — с большим запасом для медленных машин,
+    # главная проверка здесь — число запросов.
+    'notes:list': Budget(queries=3, milliseconds=5000),
+    'notes:detail': Budget(queries=3, milliseconds=300),
+    'notes:edit': Budget(queries=3, milliseconds=300),
+    'notes:delete': Budget(queries=3, milliseconds=300),
+    'notes:success': Budget(queries=2, milliseconds=300),
+    'notes:search': Budget(queries=3, milliseconds=300),
+})
+
+
+def pytest_terminal_summary(terminalreporter):
+    QUERY_BUDGET.write_summary(terminalreporter)
+
 
 class TestBase(TestCase):
     """
@@ -29,13 +49,20 @@ class TestBase(TestCase):
                          'text': 'Новый текст заметки',
                          'slug': 'new_slug'}
 
+    def setUp(self):
+        cache.clear()
+
 
 ADD_URL = reverse('notes:add')
 DELETE_URL = reverse('notes:delete', args=(NOTE_SLUG,))
 DETAIL_URL = reverse('notes:detail', args=(NOTE_SLUG,))
 EDIT_URL = reverse('notes:edit', args=(NOTE_SLUG,))
+EXPORT_URL = reverse('notes:export')
 HOME_URL = reverse('notes:home')
+IMPORT_URL = reverse('notes:import')
 LIST_URL = reverse('notes:list')
+METRICS_URL = reverse('notes:metrics')
+SEARCH_URL = reverse('notes:search')
 SUCCESS_URL = reverse('notes:success')
 LOGIN_URL = reverse('users:login')
 LOGOUT_URL = reverse('users:logout')
@@ -47,3 +74,6 @@ REDIRECT_TO_DETAIL = f'{LOGIN_URL}?next={DETAIL_URL}'
 REDIRECT_TO_EDIT = f'{LOGIN_URL}?next={EDIT_URL}'
 REDIRECT_TO_DELETE = f'{LOGIN_URL}?next={DELETE_URL}'
 REDIRECT_TO_LIST = f'{LOGIN_URL}?next={LIST_URL}'
+REDIRECT_TO_IMPORT = f'{LOGIN_URL}?next={IMPORT_URL}'
+REDIRECT_TO_SEARCH = f'{LOGIN_URL}?next={SEARCH_URL}'
+REDIRECT_TO_EXPORT = f'{LOGIN_URL}?next={EXPORT_URL}'
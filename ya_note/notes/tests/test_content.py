@@ -1,5 +1,23 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import zipfile
+from http import HTTPStatus
+from io import BytesIO, StringIO
+
 import notes.tests.conftest as conf
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from notes.exporting import export_notes
 from notes.forms import NoteForm
+from notes.importing import NoteImporter
+from notes.models import Note
+from notes.search import FTS_TABLE
+
+# Сессия и пользователь, которых загружает AuthenticationMiddleware.
+AUTH_QUERIES = 2
 
 
 class TestNotesList(conf.TestBase):
@@ -41,3 +59,226 @@ class TestNotesList(conf.TestBase):
             with self.subTest(url=url):
                 self.assertIsInstance(self.author_client.get(
                     url).context.get('form'), NoteForm)
+
+
+class TestConditionalGet(conf.TestBase):
+    """
+    Набор тестов для проверки ответов 304
+    на страницах заметок.
+    """
+
+    def test_not_modified(self):
+        """
+        Тест проверяет, что страницы заметок отвечают 304 на
+        If-None-Match и If-Modified-Since не более чем одним запросом
+        сверх загрузки сессии и пользователя.
+        """
+        for url in (conf.LIST_URL, conf.DETAIL_URL):
+            response = self.author_client.get(url)
+            for header, value in (
+                ('HTTP_IF_NONE_MATCH', response['ETag']),
+                ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+            ):
+                with self.subTest(url=url, header=header):
+                    with CaptureQueriesContext(connection) as queries:
+                        self.assertEqual(
+                            self.author_client.get(
+                                url, **{header: value}
+                            ).status_code,
+                            HTTPStatus.NOT_MODIFIED
+                        )
+                    self.assertLessEqual(len(queries), AUTH_QUERIES + 1)
+
+    def test_etag_changes(self):
+        """
+        Тест проверяет, что ETag меняется после изменения заметки
+        и не подходит другому пользователю.
+        """
+        etag = self.author_client.get(conf.LIST_URL)['ETag']
+        self.assertEqual(self.not_author_client.get(
+            conf.LIST_URL, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.OK)
+        self.author_client.post(conf.EDIT_URL, data=self.form_data)
+        self.assertEqual(self.author_client.get(
+            conf.LIST_URL, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.OK)
+
+    def test_etag_changes_after_relogin(self):
+        """
+        Тест проверяет, что после повторного входа страница
+        не отдаётся 304 по старому ETag.
+        """
+        etag = self.author_client.get(conf.LIST_URL)['ETag']
+        self.author_client.logout()
+        self.author_client.force_login(self.author)
+        self.assertEqual(self.author_client.get(
+            conf.LIST_URL, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.OK)
+
+
+class TestNoteSearch(conf.TestBase):
+    """Набор тестов для проверки полнотекстового поиска по заметкам."""
+
+    def search(self, query, client=None):
+        return (client or self.author_client).get(
+            conf.SEARCH_URL, {'q': query}
+        ).context['results']
+
+    def test_results_ranked_and_scoped_to_author(self):
+        """
+        Тест проверяет, что совпадение в заголовке выше совпадения
+        в тексте, а заметки других пользователей не находятся.
+        """
+        in_text = Note.objects.create(
+            title='Покупки', text='Купить яблоки и груши',
+            slug='in-text', author=self.author
+        )
+        in_title = Note.objects.create(
+            title='Яблоки', text='Сорта для сада',
+            slug='in-title', author=self.author
+        )
+        Note.objects.create(
+            title='Яблоки', text='Чужие яблоки',
+            slug='foreign', author=self.not_author
+        )
+        self.assertEqual(
+            [result.slug for result in self.search('яблоки')],
+            [in_title.slug, in_text.slug]
+        )
+        self.assertEqual(
+            [result.slug for result in self.search(
+                'яблок', self.not_author_client
+            )],
+            ['foreign']
+        )
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        """
+        Тест проверяет, что в сниппете выделено совпадение,
+        а разметка из текста заметки экранирована.
+        """
+        Note.objects.create(
+            title='Разметка', text='<script>alert(1)</script> поиск',
+            slug='markup', author=self.author
+        )
+        snippet = self.search('поиск')[0].snippet
+        self.assertIn('<mark>поиск</mark>', snippet)
+        self.assertNotIn('<script>', snippet)
+
+    def test_query_operators_are_ignored(self):
+        """
+        Тест проверяет, что операторы FTS5 в запросе
+        не приводят к ошибке.
+        """
+        for query in ('"', 'NOT', 'текст OR', '*', 'author_id:1', ''):
+            with self.subTest(query=query):
+                self.assertIsInstance(self.search(query), list)
+
+    def test_index_follows_changes(self):
+        """
+        Тест проверяет, что индекс обновляется при изменении,
+        удалении и массовой вставке заметок.
+        """
+        self.note.title = 'Переименованная'
+        self.note.save()
+        self.assertEqual(len(self.search('переименованная')), 1)
+        self.assertEqual(self.search('заголовок'), [])
+        self.note.delete()
+        self.assertEqual(self.search('переименованная'), [])
+        Note.objects.bulk_create(
+            Note(title='Массовая', text='Текст', slug=f'bulk-{index}',
+                 author=self.author)
+            for index in range(3)
+        )
+        self.assertEqual(len(self.search('массовая')), 3)
+
+    def test_rebuild_command(self):
+        """
+        Тест проверяет, что команда перестраивает
+        потерянный индекс.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+            )
+        self.assertEqual(self.search('заголовок'), [])
+        call_command('rebuild_notes_search', stdout=StringIO())
+        self.assertEqual(
+            [result.slug for result in self.search('заголовок')],
+            [conf.NOTE_SLUG]
+        )
+
+
+class TestNoteExport(conf.TestBase):
+    """Набор тестов для проверки выгрузки заметок."""
+
+    def export(self, file_format):
+        response = self.author_client.get(
+            conf.EXPORT_URL, {'format': file_format}
+        )
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_export_only_own_notes(self):
+        """
+        Тест проверяет, что выгружаются только заметки автора
+        и выгрузку можно загрузить обратно импортом.
+        """
+        Note.objects.create(title='Чужая', text='Текст', slug='foreign',
+                            author=self.not_author)
+        content = self.export('ndjson')
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            [{'title': self.note.title, 'text': self.note.text,
+              'slug': self.note.slug}]
+        )
+        self.note.delete()
+        self.assertEqual(
+            NoteImporter(self.author).run(BytesIO(content), 'ndjson'), (1, 0)
+        )
+
+    def test_zip_export(self):
+        """Тест проверяет архив с заметкой в Markdown на файл."""
+        with zipfile.ZipFile(BytesIO(self.export('zip'))) as archive:
+            self.assertEqual(archive.namelist(), [f'{conf.NOTE_SLUG}.md'])
+            self.assertEqual(
+                archive.read(f'{conf.NOTE_SLUG}.md').decode(),
+                f'# {self.note.title}\n\n{self.note.text}\n'
+            )
+
+    def export_peak_memory(self, count, file_format):
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст заметки. ' * 20,
+                 slug=f'export-{index}', author=self.author)
+            for index in range(Note.objects.count(), count)
+        )
+        tracemalloc.start()
+        try:
+            for _ in export_notes(self.author, file_format, chunk_size=100):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    def test_export_memory_does_not_grow(self):
+        """
+        Тест проверяет, что расход памяти при выгрузке
+        не зависит от числа заметок.
+        """
+        for file_format in ('ndjson', 'zip'):
+            with self.subTest(file_format=file_format):
+                small = self.export_peak_memory(500, file_format)
+                large = self.export_peak_memory(3000, file_format)
+                self.assertLess(large, small * 1.5)
+
+    def test_export_command(self):
+        """Тест проверяет выгрузку заметок командой export_notes."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notes.zip')
+            call_command('export_notes', self.author.username, path,
+                         format='zip', stdout=StringIO())
+            with zipfile.ZipFile(path) as archive:
+                self.assertEqual(
+                    archive.namelist(), [f'{conf.NOTE_SLUG}.md']
+                )
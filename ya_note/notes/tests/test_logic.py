@@ -1,10 +1,32 @@
+import csv
+import json
+import os
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 import notes.tests.conftest as conf
+from common.backends import USER_CACHE_KEY
+from common.profiling import make_profiling_token
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from notes.forms import WARNING
 from notes.models import Note
 from pytils.translit import slugify
 
+BENCH_REQUESTS = 30
+BENCH_CONCURRENCY = 4
+METRICS_TOKEN = 'metrics-token'
+# Сессия, пользователь, INSERT; точки сохранения не считаем.
+CREATE_NOTE_QUERIES = 3
+# То же и один запрос занятых slug по префиксу.
+CREATE_NOTE_WITH_AUTO_SLUG_QUERIES = 4
+
 
 class TestNoteCreateEditDelete(conf.TestBase):
     """
@@ -44,6 +66,73 @@ class TestNoteCreateEditDelete(conf.TestBase):
         """
         self.create_note(self.form_data['slug'])
 
+    def test_create_note_queries(self):
+        """
+        Тест проверяет, что заметка создаётся одним INSERT
+        без предварительной проверки уникальности slug.
+        """
+        auto_slug_data = self.form_data.copy()
+        auto_slug_data.pop('slug')
+        for data, expected_queries in (
+            (self.form_data, CREATE_NOTE_QUERIES),
+            (auto_slug_data, CREATE_NOTE_WITH_AUTO_SLUG_QUERIES),
+        ):
+            with self.subTest(data=data):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertRedirects(
+                        self.author_client.post(conf.ADD_URL, data=data),
+                        conf.SUCCESS_URL, fetch_redirect_response=False
+                    )
+                self.assertEqual(len([
+                    query for query in queries
+                    if 'SAVEPOINT' not in query['sql']
+                ]), expected_queries)
+
+    def test_auto_generated_slugs_for_same_title(self):
+        """
+        Тест проверяет, что заметкам с одинаковым заголовком
+        без slug подбираются slug с числовым суффиксом.
+        """
+        self.form_data.pop('slug')
+        for _ in range(3):
+            self.author_client.post(conf.ADD_URL, data=self.form_data)
+        slug = slugify(self.form_data['title'])
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=self.form_data['title']
+            ).values_list('slug', flat=True)),
+            {slug, f'{slug}-2', f'{slug}-3'}
+        )
+
+    def test_auto_generated_slug_retried_on_conflict(self):
+        """
+        Тест проверяет, что если подобранный slug успели занять,
+        он подбирается заново.
+        """
+        slug = slugify(self.form_data['title'])
+        Note.objects.create(title=self.form_data['title'], text='Текст',
+                            slug=slug, author=self.not_author)
+        self.form_data.pop('slug')
+        with mock.patch.object(
+            Note, 'get_taken_slugs',
+            side_effect=(set(), {slug}),
+        ):
+            self.assertRedirects(self.author_client.post(
+                conf.ADD_URL, data=self.form_data), conf.SUCCESS_URL)
+        self.assertTrue(Note.objects.filter(
+            slug=f'{slug}-2', author=self.author
+        ).exists())
+
+    def test_taken_slugs_skip_longer_slugs(self):
+        """
+        Тест проверяет, что занятыми считаются только base и base-N,
+        а не любые slug с тем же началом.
+        """
+        for slug in ('note', 'note-2', 'notebook', 'notes-2'):
+            Note.objects.create(title='Заметка', text='Текст',
+                                slug=slug, author=self.author)
+        self.assertEqual(Note.get_taken_slugs('note'), {'note', 'note-2'})
+
     def test_auto_generated_slug_if_not_provided(self):
         """
         Тест проверяет, что если в форме не указан slug, то он
@@ -66,6 +155,15 @@ class TestNoteCreateEditDelete(conf.TestBase):
             errors=self.note.slug + WARNING)
         self.assertEqual(set(Note.objects.all()), original_notes)
 
+    def test_other_integrity_error_is_not_slug_error(self):
+        """
+        Тест проверяет, что ошибка целостности при свободном slug
+        не выдаётся за занятый slug.
+        """
+        with mock.patch.object(Note, 'save', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.author_client.post(conf.ADD_URL, data=self.form_data)
+
     def test_author_can_edit_note(self):
         """
         Тест проверяющий что автор
@@ -119,3 +217,265 @@ class TestNoteCreateEditDelete(conf.TestBase):
         self.assertEqual(note.title, self.note.title)
         self.assertEqual(note.text, self.note.text)
         self.assertEqual(note.slug, self.note.slug)
+
+
+class TestNoteImport(conf.TestBase):
+    """Набор тестов для проверки импорта заметок."""
+
+    def test_import_ndjson(self):
+        """
+        Тест проверяет, что корректные строки импортируются, а
+        некорректные и с занятым slug отклоняются с указанием причины.
+        """
+        rows = [
+            {'title': 'Первая', 'text': 'Текст', 'slug': 'first'},
+            {'title': 'Без текста', 'slug': 'no-text'},
+            {'title': 'Занятый slug', 'text': 'Текст', 'slug': conf.NOTE_SLUG},
+            {'title': 'Повтор', 'text': 'Текст'},
+            {'title': 'Повтор', 'text': 'Текст'},
+        ]
+        content = '\n'.join(json.dumps(row) for row in rows) + '\nне json\n'
+        response = self.author_client.post(conf.IMPORT_URL, data={
+            'file': SimpleUploadedFile('notes.ndjson', content.encode()),
+        })
+        self.assertEqual(response.context['inserted'], 3)
+        self.assertEqual(response.context['rejected'], 3)
+        rejections = dict(response.context['rejections'])
+        self.assertEqual(set(rejections), {2, 3, 6})
+        self.assertEqual(rejections[3], conf.NOTE_SLUG + WARNING)
+        slug = slugify('Повтор')
+        self.assertEqual(
+            set(Note.objects.filter(
+                author=self.author, title='Повтор'
+            ).values_list('slug', flat=True)),
+            {slug, f'{slug}-2'}
+        )
+        self.assertTrue(Note.objects.filter(
+            author=self.author, slug='first'
+        ).exists())
+
+    def test_import_bom_and_bad_encoding(self):
+        """
+        Тест проверяет, что BOM в начале файла не мешает импорту,
+        а байты не в UTF-8 и ошибки разбора CSV отклоняются
+        без ошибки сервера.
+        """
+        bad_bytes = 'Заметка'.encode('cp1251')
+        for name, content, inserted, rejected in (
+            ('bom.csv', '\ufefftitle,text\nС BOM,Текст\n'.encode(), 1, {}),
+            ('bom.ndjson', '\ufeff{"title": "BOM", "text": "Текст"}\n'
+             .encode(), 1, {}),
+            ('cp1251.csv', b'title,text\n' + bad_bytes + b',1\n', 0, {2}),
+            ('huge.csv', b'title,text\n1,' + b'x' * (
+                csv.field_size_limit() + 1
+            ) + b'\n', 0, {2}),
+            ('cp1251.ndjson', b'{"title": "' + bad_bytes + b'"}\n'
+             b'{"title": "UTF-8", "text": "1"}\n', 1, {1}),
+        ):
+            with self.subTest(name=name):
+                response = self.author_client.post(conf.IMPORT_URL, data={
+                    'file': SimpleUploadedFile(name, content),
+                })
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.context['inserted'], inserted)
+                self.assertEqual(
+                    set(dict(response.context['rejections'])), set(rejected)
+                )
+
+    def test_import_command_csv(self):
+        """
+        Тест проверяет импорт из CSV командой import_notes
+        пачками меньше размера файла.
+        """
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', encoding='utf-8', delete=False
+        ) as notes_file:
+            notes_file.write('title,text,slug\n')
+            for index in range(5):
+                notes_file.write(f'Заметка {index},Текст,\n')
+        self.addCleanup(os.remove, notes_file.name)
+        stdout = StringIO()
+        call_command(
+            'import_notes', self.not_author.username, notes_file.name,
+            batch_size=2, stdout=stdout
+        )
+        self.assertIn('Добавлено заметок: 5', stdout.getvalue())
+        self.assertEqual(
+            Note.objects.filter(author=self.not_author).count(), 5
+        )
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['common.backends.CachedModelBackend'],
+)
+class TestAuthCache(conf.TestBase):
+    """Набор тестов для проверки кеша сессий и пользователей."""
+
+    def test_authenticated_request_without_auth_queries(self):
+        """
+        Тест проверяет, что повторный запрос авторизованного
+        пользователя не читает сессию и пользователя из базы данных.
+        """
+        self.author_client.get(conf.HOME_URL)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(conf.HOME_URL)
+        self.assertEqual(response.context['user'], self.author)
+        self.assertFalse([
+            query for query in queries
+            if 'auth_user' in query['sql']
+            or 'django_session' in query['sql']
+        ])
+
+    def test_cached_user_invalidated(self):
+        """
+        Тест проверяет, что после смены пароля и удаления
+        пользователя его сессия перестаёт действовать.
+        """
+        for user, client, change in (
+            (self.author, self.author_client,
+             lambda user: (user.set_password('new-password'), user.save())),
+            (self.not_author, self.not_author_client,
+             lambda user: user.delete()),
+        ):
+            with self.subTest(user=user.username):
+                client.get(conf.HOME_URL)
+                change(user)
+                self.assertRedirects(
+                    client.get(conf.LIST_URL), conf.REDIRECT_TO_LIST
+                )
+
+    def test_logout_forgets_user(self):
+        """
+        Тест проверяет, что при выходе пользователь
+        удаляется из кеша.
+        """
+        self.author_client.get(conf.HOME_URL)
+        key = USER_CACHE_KEY.format(pk=self.author.pk)
+        self.assertIsNotNone(cache.get(key))
+        self.author_client.get(conf.LOGOUT_URL)
+        self.assertIsNone(cache.get(key))
+
+
+class TestRequestProfiling(conf.TestBase):
+    """Набор тестов для проверки профилирования запросов."""
+
+    def test_profiled_only_on_request(self):
+        """
+        Тест проверяет, что запрос профилируется по подписанному
+        заголовку и по параметру только для персонала.
+        """
+        self.not_author.is_staff = True
+        self.not_author.save()
+        for client, params, headers, profiled in (
+            (self.client, {},
+             {'HTTP_X_PROFILE': make_profiling_token()}, True),
+            (self.client, {}, {'HTTP_X_PROFILE': 'profile:подделка'}, False),
+            (self.author_client, {'profile': ''}, {}, False),
+            (self.not_author_client, {'profile': ''}, {}, True),
+            (self.not_author_client, {}, {}, False),
+        ):
+            with self.subTest(params=params, headers=headers), \
+                    tempfile.TemporaryDirectory() as directory, \
+                    override_settings(PROFILING_DIR=directory):
+                client.get(conf.HOME_URL, params, **headers)
+                files = sorted(os.listdir(directory))
+                self.assertEqual(len(files), 2 if profiled else 0)
+                for name in files:
+                    self.assertIn('notes-home', name)
+
+    @override_settings(PROFILING_TOKEN_MAX_USES=2)
+    def test_token_use_limit(self):
+        """
+        Тест проверяет, что токен действует ограниченное число раз,
+        а профили одного маршрута пишутся в разные файлы.
+        """
+        token = make_profiling_token()
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(PROFILING_DIR=directory):
+            for _ in range(3):
+                self.client.get(conf.HOME_URL, HTTP_X_PROFILE=token)
+            self.assertEqual(len(os.listdir(directory)), 4)
+
+
+@override_settings(METRICS_TOKEN=METRICS_TOKEN)
+class TestMetrics(conf.TestBase):
+    """Набор тестов для проверки метрик маршрутов."""
+
+    def test_metrics_by_route(self):
+        """
+        Тест проверяет, что запросы попадают во все гистограммы
+        с именем маршрута и методом, нестандартный метод — как other,
+        а без токена метрики недоступны.
+        """
+        self.author_client.get(conf.EDIT_URL)
+        self.author_client.generic('PROPFIND-X', conf.EDIT_URL)
+        self.author_client.post(conf.EDIT_URL, data=self.form_data)
+        content = self.client.get(
+            conf.METRICS_URL, HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}'
+        ).content.decode()
+        for name in (
+            'http_request_duration_seconds', 'db_queries_per_request',
+            'db_query_duration_seconds', 'template_render_duration_seconds',
+            'http_response_size_bytes',
+        ):
+            with self.subTest(name=name):
+                self.assertIn(
+                    f'{name}_count{{view="notes:edit",method="GET"}}',
+                    content
+                )
+        self.assertIn(
+            'http_request_duration_seconds_count'
+            '{view="notes:edit",method="POST"}',
+            content
+        )
+        self.assertIn('{view="notes:edit",method="other"}', content)
+        self.assertNotIn('PROPFIND-X', content)
+        self.assertEqual(
+            self.client.get(conf.METRICS_URL).status_code,
+            HTTPStatus.NOT_FOUND
+        )
+
+
+class TestBenchRoutes(TransactionTestCase):
+    """
+    Набор тестов для проверки нагрузочного прогона маршрутов.
+
+    Запросы идут из других потоков, поэтому данные теста
+    должны быть записаны в базу, а не лежать в транзакции.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_baseline_and_regression(self):
+        """
+        Тест проверяет, что bench_routes пишет базовый замер по обоим
+        транспортам и падает, если маршрут стал хуже базового.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command(
+                'bench_routes', requests=BENCH_REQUESTS,
+                concurrency=BENCH_CONCURRENCY,
+                notes=5, output=path, stdout=StringIO()
+            )
+            with open(path, encoding='utf-8') as file:
+                baseline = json.load(file)
+            self.assertEqual(set(baseline), {'inprocess', 'http'})
+            for routes in baseline.values():
+                self.assertEqual(
+                    set(routes), {'notes:list', 'notes:add', 'notes:edit'}
+                )
+                for stats in routes.values():
+                    self.assertEqual(stats['errors'], 0)
+                    stats['p95'], stats['rps'] = 0, float('inf')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(baseline, file)
+            with self.assertRaises(CommandError):
+                call_command(
+                    'bench_routes', requests=BENCH_REQUESTS,
+                    concurrency=BENCH_CONCURRENCY,
+                    notes=5, baseline=path, stdout=StringIO()
+                )
+        self.assertFalse(Note.objects.exists())
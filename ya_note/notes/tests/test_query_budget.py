@@ -0,0 +1,41 @@
+import notes.tests.conftest as conf
+from common.query_budget import QueryBudgetMixin
+from notes.models import Note
+
+NOTE_SCALES = (10, 10_000)
+
+
+class TestQueryBudget(QueryBudgetMixin, conf.TestBase):
+    """
+    Набор тестов для проверки бюджета запросов и времени
+    ответа маршрутов приложения notes.
+    """
+    query_budget = conf.QUERY_BUDGET
+
+    def test_routes_query_budget(self):
+        """
+        Тест проверяет, что маршруты укладываются в бюджет, а число
+        запросов не растёт с числом заметок пользователя.
+        """
+        routes = (
+            ('notes:home', conf.HOME_URL),
+            ('notes:add', conf.ADD_URL),
+            ('notes:list', conf.LIST_URL),
+            ('notes:detail', conf.DETAIL_URL),
+            ('notes:edit', conf.EDIT_URL),
+            ('notes:delete', conf.DELETE_URL),
+            ('notes:success', conf.SUCCESS_URL),
+            ('notes:search', f'{conf.SEARCH_URL}?q=заметка'),
+        )
+        for scale in NOTE_SCALES:
+            Note.objects.bulk_create(
+                Note(title=f'Заметка {index}', text='Текст',
+                     slug=f'note-{index}', author=self.author)
+                for index in range(Note.objects.count(), scale)
+            )
+            for route, url in routes:
+                with self.query_budget.measure(route, scale):
+                    self.author_client.get(url)
+        for route, _ in routes:
+            with self.subTest(route=route):
+                self.assert_within_budget(route)
@@ -0,0 +1,57 @@
+import re
+
+import notes.tests.conftest as conf
+from django.db import connection
+from django.test import RequestFactory
+from notes.search import SEARCH_SQL, build_match
+from notes.views import NoteDetail, NotesList
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\w+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class TestQueryPlans(conf.TestBase):
+    """
+    Набор тестов для проверки того, что запросы
+    страниц заметок используют индексы.
+    """
+
+    def get_view_queryset(self, view_class):
+        """Возвращает queryset представления для автора заметки."""
+        request = RequestFactory().get('/')
+        request.user = self.author
+        view = view_class()
+        view.setup(request, slug=conf.NOTE_SLUG)
+        return view.get_queryset()
+
+    def assert_uses_indexes(self, queryset):
+        """Проверяет, что в плане нет полного скана и сортировки."""
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            self.assertNotRegex(line, FULL_SCAN, plan)
+            self.assertNotIn(TEMP_SORT, line, plan)
+
+    def test_notes_list_plan(self):
+        """Тест проверяет план запроса списка заметок."""
+        self.assert_uses_indexes(self.get_view_queryset(NotesList))
+
+    def test_note_detail_plan(self):
+        """Тест проверяет план запроса заметки."""
+        self.assert_uses_indexes(
+            self.get_view_queryset(NoteDetail).filter(slug=conf.NOTE_SLUG)
+        )
+
+    def test_search_plan(self):
+        """
+        Тест проверяет, что поиск идёт по индексу FTS5,
+        а заметки выбираются по первичному ключу.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + SEARCH_SQL, (
+                '[', ']', 10, build_match(self.author.pk, 'заметка'),
+                10.0, 1.0, 50,
+            ))
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
+        for line in plan.splitlines():
+            self.assertNotRegex(line, FULL_SCAN, plan)
@@ -26,10 +26,17 @@ class TestRoutes(conf.TestBase):
             (conf.EDIT_URL, self.author_client, HTTPStatus.OK),
             (conf.EDIT_URL, self.not_author_client, HTTPStatus.NOT_FOUND),
             (conf.EDIT_URL, self.client, HTTPStatus.FOUND),
+            (conf.EXPORT_URL, self.author_client, HTTPStatus.OK),
+            (conf.EXPORT_URL, self.client, HTTPStatus.FOUND),
             (conf.HOME_URL, self.client, HTTPStatus.OK),
+            (conf.IMPORT_URL, self.author_client, HTTPStatus.OK),
+            (conf.IMPORT_URL, self.client, HTTPStatus.FOUND),
             (conf.LIST_URL, self.author_client, HTTPStatus.OK),
             (conf.LIST_URL, self.client, HTTPStatus.FOUND),
             (conf.LOGIN_URL, self.client, HTTPStatus.OK),
+            (conf.METRICS_URL, self.client, HTTPStatus.NOT_FOUND),
+            (conf.SEARCH_URL, self.author_client, HTTPStatus.OK),
+            (conf.SEARCH_URL, self.client, HTTPStatus.FOUND),
             (conf.LOGOUT_URL, self.client, HTTPStatus.OK),
             (conf.SIGNUP_URL, self.client, HTTPStatus.OK),
             (conf.SUCCESS_URL, self.author_client, HTTPStatus.OK),
@@ -51,6 +58,9 @@ class TestRoutes(conf.TestBase):
             (conf.EDIT_URL, conf.REDIRECT_TO_EDIT),
             (conf.DELETE_URL, conf.REDIRECT_TO_DELETE),
             (conf.LIST_URL, conf.REDIRECT_TO_LIST),
+            (conf.IMPORT_URL, conf.REDIRECT_TO_IMPORT),
+            (conf.SEARCH_URL, conf.REDIRECT_TO_SEARCH),
+            (conf.EXPORT_URL, conf.REDIRECT_TO_EXPORT),
         ):
             with self.subTest(url=url):
                 self.assertRedirects(
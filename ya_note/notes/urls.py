@@ -1,3 +1,4 @@
+from common import metrics
 from django.urls import path
 from notes import views
 
@@ -9,6 +10,10 @@ urlpatterns = [
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
+    path('import/', views.NoteImport.as_view(), name='import'),
+    path('export/', views.NoteExport.as_view(), name='export'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('metrics/', metrics.metrics_view, name='metrics'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
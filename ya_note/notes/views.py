@@ -1,9 +1,19 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
 
-from .forms import NoteForm
+from .cache import conditional_notes_page
+from .exporting import CONTENT_TYPES, FORMATS, export_notes
+from .forms import WARNING, NoteForm, NoteImportForm
+from .importing import NoteImporter, get_format
 from .models import Note
+from .search import search_notes
+
+# Сколько отклонённых строк показывать на странице импорта.
+MAX_REPORTED_REJECTIONS = 100
 
 
 class Home(generic.TemplateView):
@@ -26,22 +36,40 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormBase(NoteBase):
+    """Базовый класс для создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Занятый slug отклоняет база данных, показываем ошибку в форме.
+
+        Другие нарушения целостности не относятся к slug и пробрасываются.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            slug_taken = Note.objects.filter(
+                slug=form.instance.slug
+            ).exclude(pk=form.instance.pk).exists()
+            if not slug_taken:
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormBase, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormBase, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -49,11 +77,71 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
+@method_decorator(conditional_notes_page, name='get')
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
 
+@method_decorator(conditional_notes_page, name='get')
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteImport(LoginRequiredMixin, generic.FormView):
+    """Импорт заметок из файла NDJSON или CSV."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        rejections = []
+
+        def on_reject(number, reason):
+            if len(rejections) < MAX_REPORTED_REJECTIONS:
+                rejections.append((number, reason))
+
+        inserted, rejected = NoteImporter(
+            self.request.user, on_reject=on_reject
+        ).run(upload.file, form.cleaned_data['format']
+              or get_format(upload.name))
+        return self.render_to_response(self.get_context_data(
+            form=form, inserted=inserted, rejected=rejected,
+            rejections=rejections,
+        ))
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """
+    Выгрузка всех заметок пользователя в NDJSON или zip с Markdown.
+
+    Ответ отдаётся потоком по мере чтения заметок из базы данных.
+    """
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get('format')
+        if file_format not in FORMATS:
+            file_format = FORMATS[0]
+        response = StreamingHttpResponse(
+            export_notes(request.user, file_format),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{file_format}"'
+        )
+        return response
+
+
+@method_decorator(conditional_notes_page, name='get')
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        query = self.request.GET.get('q', '').strip()
+        return super().get_context_data(
+            query=query,
+            results=search_notes(self.request.user.pk, query),
+            **kwargs
+        )
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from django.urls import reverse_lazy
 from dotenv import load_dotenv
@@ -7,6 +8,9 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код проектов (пакет common) лежит в корне репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-this-is-a-test-key-for-development-only')
 
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
@@ -21,15 +25,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'notes.apps.NotesConfig'
+    'common.apps.CommonConfig',
+    'notes.apps.NotesConfig',
 ]
 
 MIDDLEWARE = [
+    'common.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,13 +62,54 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+# common.sqlite — SQLite, где atomic() начинается с BEGIN IMMEDIATE.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'common.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        # В файле, а не в памяти: см. common.sqlite.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Профиль соединения SQLite для common.db.apply_sqlite_pragmas.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+} if os.getenv('SQLITE_TUNING', 'True') == 'True' else {}
+
+# При нескольких процессах кеш должен быть общим, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# и CACHE_LOCATION=127.0.0.1:11211.
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', LOCMEM_CACHE),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+SHARED_CACHE = CACHES['default']['BACKEND'] != LOCMEM_CACHE
+
+# Сессия и пользователь запроса из кеша (common.backends). Выход
+# и смена пароля сбрасывают кеш только в своём процессе, поэтому
+# по умолчанию слой включён лишь с общим кешем. Смена AUTH_CACHE
+# меняет AUTHENTICATION_BACKENDS и завершает действующие сессии.
+AUTH_CACHE = os.getenv('AUTH_CACHE', str(SHARED_CACHE)) == 'True'
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', (
+    'django.contrib.sessions.backends.cached_db' if AUTH_CACHE
+    else 'django.contrib.sessions.backends.db'
+))
+AUTHENTICATION_BACKENDS = [
+    'common.backends.CachedModelBackend' if AUTH_CACHE
+    else 'django.contrib.auth.backends.ModelBackend'
+]
+USER_CACHE_TIMEOUT = 60 * 60
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -90,3 +138,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Профилирование отдельных запросов, без каталога отключено.
+PROFILING_DIR = os.getenv('PROFILING_DIR') or None
+PROFILING_TOP = 30
+# Токен X-Profile действует час и не больше десяти запросов.
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_TOKEN_MAX_USES = 10
+
+# Метрики Prometheus из common.metrics: /metrics/ отвечает 404
+# без заголовка Authorization: Bearer METRICS_TOKEN.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None